@@ -0,0 +1,49 @@
+"""create usage records
+
+Revision ID: b9d4e6f2a3c8
+Revises: f7a3c1d9e2b4
+Create Date: 2026-10-18 18:20:41.207394
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b9d4e6f2a3c8"
+down_revision: Union[str, None] = "f7a3c1d9e2b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "usage_records",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("api_token_id", sa.Integer(), nullable=True),
+        sa.Column("endpoint", sa.String(length=32), nullable=False),
+        sa.Column("report_id", sa.String(length=64), nullable=True),
+        sa.Column("audio_sec", sa.Float(), nullable=False),
+        sa.Column("chunk_count", sa.Integer(), nullable=False),
+        sa.Column("asr_latency_ms", sa.Float(), nullable=False),
+        sa.Column("llm_model", sa.String(length=64), nullable=True),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_usage_records_user_created", "usage_records", ["user_id", "created_at"]
+    )
+    op.create_index(
+        "ix_usage_records_token_created",
+        "usage_records",
+        ["api_token_id", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_table("usage_records")
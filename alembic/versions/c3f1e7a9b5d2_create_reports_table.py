@@ -0,0 +1,46 @@
+"""create reports table
+
+Revision ID: c3f1e7a9b5d2
+Revises: a8c94d2f2887
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f1e7a9b5d2"
+down_revision: Union[str, None] = "a8c94d2f2887"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "reports",
+        sa.Column("id", sa.String(length=64), primary_key=True),
+        sa.Column(
+            "owner_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_sec", sa.Float(), nullable=True),
+        sa.Column("language", sa.String(length=16), nullable=True),
+        sa.Column("markdown_path", sa.String(), nullable=True),
+        sa.Column("pdf_path", sa.String(), nullable=True),
+    )
+    op.create_index(
+        "ix_reports_owner_created", "reports", ["owner_id", "created_at", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_reports_owner_created", table_name="reports")
+    op.drop_table("reports")
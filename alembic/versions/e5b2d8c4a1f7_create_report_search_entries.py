@@ -0,0 +1,72 @@
+"""create report search entries
+
+Revision ID: e5b2d8c4a1f7
+Revises: c3f1e7a9b5d2
+Create Date: 2026-10-18 11:40:03.552917
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b2d8c4a1f7"
+down_revision: Union[str, None] = "c3f1e7a9b5d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "report_search_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "report_id",
+            sa.String(length=64),
+            sa.ForeignKey("reports.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("speaker", sa.String(), nullable=True),
+        sa.Column("start_ms", sa.Integer(), nullable=True),
+        sa.Column("end_ms", sa.Integer(), nullable=True),
+        sa.Column("text", sa.Text(), nullable=False),
+    )
+    op.create_index(
+        "ix_report_search_entries_report", "report_search_entries", ["report_id"]
+    )
+    op.create_index(
+        "ix_report_search_entries_owner", "report_search_entries", ["owner_id"]
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE report_search_fts USING fts5("
+            "text, content='report_search_entries', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER report_search_ai AFTER INSERT ON report_search_entries "
+            "BEGIN INSERT INTO report_search_fts(rowid, text) VALUES (new.id, new.text); END"
+        )
+        op.execute(
+            "CREATE TRIGGER report_search_ad AFTER DELETE ON report_search_entries "
+            "BEGIN INSERT INTO report_search_fts(report_search_fts, rowid, text) "
+            "VALUES ('delete', old.id, old.text); END"
+        )
+    elif dialect == "postgresql":
+        op.execute(
+            "CREATE INDEX ix_report_search_entries_tsv ON report_search_entries "
+            "USING gin (to_tsvector('simple', text))"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS report_search_fts")
+    op.drop_table("report_search_entries")
@@ -0,0 +1,68 @@
+"""hash api tokens
+
+Revision ID: f7a3c1d9e2b4
+Revises: e5b2d8c4a1f7
+Create Date: 2026-10-18 16:05:12.418205
+
+"""
+
+import hashlib
+import hmac
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7a3c1d9e2b4"
+down_revision: Union[str, None] = "e5b2d8c4a1f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _hash(token: str) -> str:
+    # Figé ici : identique à app.core.security.hash_api_token
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), token.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table("api_tokens") as batch:
+        batch.add_column(sa.Column("token_hash", sa.String(length=64), nullable=True))
+
+    api_tokens = sa.table(
+        "api_tokens",
+        sa.column("id", sa.Integer()),
+        sa.column("token", sa.String()),
+        sa.column("token_hash", sa.String()),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(api_tokens.c.id, api_tokens.c.token)).fetchall()
+    for token_id, token in rows:
+        bind.execute(
+            api_tokens.update()
+            .where(api_tokens.c.id == token_id)
+            .values(token_hash=_hash(token))
+        )
+
+    with op.batch_alter_table("api_tokens") as batch:
+        batch.drop_index("ix_api_tokens_token")
+        batch.drop_column("token")
+        batch.alter_column(
+            "token_hash", existing_type=sa.String(length=64), nullable=False
+        )
+        batch.create_index("ix_api_tokens_token_hash", ["token_hash"], unique=True)
+
+
+def downgrade():
+    # Les jetons en clair ne sont pas récupérables : ils sont tous révoqués
+    op.execute("DELETE FROM api_tokens")
+    with op.batch_alter_table("api_tokens") as batch:
+        batch.drop_index("ix_api_tokens_token_hash")
+        batch.drop_column("token_hash")
+        batch.add_column(sa.Column("token", sa.String(), nullable=False))
+        batch.create_index("ix_api_tokens_token", ["token"], unique=True)
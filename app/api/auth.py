@@ -9,7 +9,11 @@ from fastapi import APIRouter, Header, HTTPException, status
 from sqlalchemy import select
 
 from app.api.deps import AuthUserDep, DBSessionDep, TokenUserDep
-from app.core.security import get_password_hash
+from app.core.security import (
+    PasswordHashingOverloaded,
+    get_password_hash_async,
+    hash_api_token,
+)
 from app.models.user import APIToken, User
 from app.schemas.token import RefreshToken, Token
 from app.schemas.user import UserCreate, UserLogin, UserOut
@@ -22,6 +26,14 @@ from app.services.auth import (
 router = APIRouter()
 
 
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/signup", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def create_user(user_data: UserCreate, db: DBSessionDep) -> User:
     """Register a new user."""
@@ -35,10 +47,11 @@ async def create_user(user_data: UserCreate, db: DBSessionDep) -> User:
         )
 
     # Create new user
-    user = User(
-        username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
-    )
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHashingOverloaded:
+        raise _overloaded()
+    user = User(username=user_data.username, hashed_password=hashed_password)
     db.add(user)
     await db.commit()
     await db.refresh(user)
@@ -51,7 +64,10 @@ async def login(
     db: DBSessionDep,
 ) -> Dict:
     """Authenticate user and return tokens."""
-    user = await authenticate_user(db, data.username, data.password)
+    try:
+        user = await authenticate_user(db, data.username, data.password)
+    except PasswordHashingOverloaded:
+        raise _overloaded()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -106,7 +122,24 @@ async def create_api_token(
     user: AuthUserDep,
 ) -> Dict:
     token_value = secrets.token_hex(32)
-    db_token = APIToken(token=token_value, user_id=user.id)
+    # Seul le hash est stocké : le jeton n'est visible qu'à sa création
+    db_token = APIToken(token_hash=hash_api_token(token_value), user_id=user.id)
     db.add(db_token)
     await db.commit()
     return {"api_token": token_value}
+
+
+@router.delete("/api-token", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_api_token(
+    db: DBSessionDep,
+    user: TokenUserDep,
+    token: str = Header(..., alias="X-API-Token"),
+) -> None:
+    """Revoke the API token used to authenticate this request."""
+    result = await db.execute(
+        select(APIToken).filter(APIToken.token_hash == hash_api_token(token))
+    )
+    db_token = result.scalar_one_or_none()
+    if db_token is not None:
+        await db.delete(db_token)
+        await db.commit()
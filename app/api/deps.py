@@ -2,20 +2,23 @@
 API dependencies.
 """
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Annotated, Optional, cast
+from typing import Annotated, Optional, Tuple, cast
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
+from app.core.security import hash_api_token
 from app.db.session import get_db
 from app.models.user import APIToken, User
 from app.schemas.token import TokenPayload
+from app.services import principal_cache
+from app.services.fair_scheduler import ANONYMOUS
 
 DBSessionDep = Annotated[AsyncSession, Depends(get_db)]
 
@@ -34,13 +37,19 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        if not token:
-            raise credentials_exception
-        token_seg = token.split(" ")
-        if len(token_seg) != 2 or token_seg[0] != "Bearer":
-            raise credentials_exception
+    if not token:
+        raise credentials_exception
+    token_seg = token.split(" ")
+    if len(token_seg) != 2 or token_seg[0] != "Bearer":
+        raise credentials_exception
 
+    # Chemin rapide : ni décodage JWT ni requête SQL
+    cache_key = principal_cache.token_key(token_seg[1])
+    cached = await principal_cache.get_cached_user(db, cache_key)
+    if cached is not None:
+        return cached
+
+    try:
         payload = jwt.decode(
             token_seg[1], settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
@@ -54,29 +63,88 @@ async def get_current_user(
     user = cast(Optional[User], result.scalar_one_or_none())
     if user is None:
         raise credentials_exception
+    principal_cache.cache_user(cache_key, user, token_data.exp)
     return user
 
 
 AuthUserDep = Annotated[User, Depends(get_current_user)]
 
+
+async def get_optional_user(
+    db: DBSessionDep,
+    token: str = Depends(oauth2_scheme),
+) -> Optional[User]:
+    """Same as get_current_user, but anonymous requests are allowed."""
+    if not token:
+        return None
+    return await get_current_user(db, token)
+
+
+OptionalUserDep = Annotated[Optional[User], Depends(get_optional_user)]
+
 api_key_header = APIKeyHeader(name="X-API-Token", auto_error=False)
 
 
+async def _resolve_api_token(db: AsyncSession, api_token: str) -> Tuple[User, int]:
+    """(utilisateur, id du jeton) d'un jeton API, via le cache des principaux."""
+    token_hash = hash_api_token(api_token)
+    cached = await principal_cache.get_cached_token_user(db, token_hash)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(User, APIToken.id)
+        .join(APIToken, APIToken.user_id == User.id)
+        .filter(APIToken.token_hash == token_hash)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=401, detail="Invalid API token")
+    user, token_id = row
+    principal_cache.cache_token_user(token_hash, user, token_id)
+    return user, token_id
+
+
 async def get_current_user_token(
     db: DBSessionDep, api_token: str = Depends(api_key_header)
 ) -> User:
     if not api_token:
         raise HTTPException(status_code=401, detail="API token missing")
-
-    result = await db.execute(
-        select(APIToken)
-        .options(selectinload(APIToken.user))
-        .filter(APIToken.token == api_token)
-    )
-    token_record = cast(Optional[APIToken], result.scalar_one_or_none())
-    if not token_record:
-        raise HTTPException(status_code=401, detail="Invalid API token")
-    return cast(User, token_record.user)
+    user, _ = await _resolve_api_token(db, api_token)
+    return user
 
 
 TokenUserDep = Annotated[User, Depends(get_current_user_token)]
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Appelant d'une requête, pour l'attribution des rapports et de la consommation."""
+
+    user_id: Optional[int] = None
+    api_token_id: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        """Clé de file d'attente (ordonnancement équitable de l'ASR)."""
+        if self.api_token_id is not None:
+            return f"token:{self.api_token_id}"
+        if self.user_id is not None:
+            return f"user:{self.user_id}"
+        return ANONYMOUS
+
+
+async def get_optional_principal(
+    db: DBSessionDep,
+    token: str = Depends(oauth2_scheme),
+    api_token: str = Depends(api_key_header),
+) -> Principal:
+    """Jeton API (X-API-Token), sinon JWT, sinon appel anonyme."""
+    if api_token:
+        token_user, token_id = await _resolve_api_token(db, api_token)
+        return Principal(user_id=cast(int, token_user.id), api_token_id=token_id)
+    user = await get_optional_user(db, token)
+    return Principal(user_id=cast(int, user.id) if user else None)
+
+
+OptionalPrincipalDep = Annotated[Principal, Depends(get_optional_principal)]
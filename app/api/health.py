@@ -4,7 +4,11 @@ Health check endpoints.
 
 from fastapi import APIRouter, status
 from pydantic import BaseModel
-from typing import Dict
+from typing import Any, Dict
+
+from app.db.session import sessionmanager
+from app.services import principal_cache, usage
+from app.services.fair_scheduler import scheduler
 
 router = APIRouter()
 
@@ -20,3 +24,29 @@ class HealthStatusOutput(BaseModel):
 async def health_check() -> Dict:
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+class CacheStats(BaseModel):
+
+    size: int
+    hits: int
+    misses: int
+
+
+class MetricsOutput(BaseModel):
+
+    principal_cache: CacheStats
+    db_pool: Dict[str, Any]
+    usage_ledger: Dict[str, int]
+    asr_scheduler: Dict[str, Any]
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK, response_model=MetricsOutput)
+async def metrics() -> Dict:
+    """In-process cache, connection pool, usage ledger and ASR queue counters."""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "db_pool": sessionmanager.pool_stats(),
+        "usage_ledger": usage.ledger.stats(),
+        "asr_scheduler": scheduler.stats(),
+    }
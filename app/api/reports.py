@@ -1,22 +1,65 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple, cast
 import os, json, traceback
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Form
-from fastapi.responses import JSONResponse, FileResponse
+import numpy as np
 
-from app.schemas.reports import TranscribeResponse, Transcript, TranscriptSegment
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import AuthUserDep, DBSessionDep, OptionalPrincipalDep
+from app.core.config import settings
+from app.db.session import sessionmanager
+from app.schemas.reports import (
+    ReportOut,
+    ReportPage,
+    SearchHit,
+    SegmentsResponse,
+    SearchResponse,
+    TranscribeResponse,
+    Transcript,
+)
 from app.services.transcription import (
     transcribe_audio,
+    transcribe_audio_with_advanced_diarization,
+    transcribe_audio_with_clustering,
+    AudioRejected,
+    plan_upload,
     TranscriptionError,
     assign_speakers_round_robin,
+    merge_speaker_turns,
 )
 from app.services.notes import (
     generate_structured_notes,
     render_markdown,
     save_markdown,
+    save_transcript_json,
+    load_transcript_json,
     generate_pdf_report,
     make_report_id,
 )
+from app.services import fair_scheduler, usage
+from app.services.report_files import build_file_response, iter_zip_bundle
+from app.services.reports import (
+    InvalidCursor,
+    attach_exports,
+    delete_reports,
+    get_report,
+    list_reports_for_user,
+    record_report,
+)
+from app.services.search import index_report, search_reports
+from app.services.segment_store import SegmentStore
+from app.services.transcript_index import (
+    TranscriptIndex,
+    decode_segment_cursor,
+    encode_segment_cursor,
+    load_transcript_index,
+    resolve_topics,
+    save_transcript_index,
+)
+from app.services.storage import StorageSweeper, get_storage
 from app.models.notes import NotesResponse, MeetingSummary
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -24,14 +67,60 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 DATA_ROOT = os.getenv("DATA_ROOT", "/data/reports")
 
 
+async def _delete_evicted(report_ids: List[str]) -> None:
+    async with sessionmanager.session() as db:
+        await delete_reports(db, report_ids)
+
+
+# Rétention / quota hors du chemin des requêtes (démarré par le lifespan)
+storage_sweeper = StorageSweeper(
+    lambda: get_storage(DATA_ROOT), _delete_evicted, settings.REPORT_SWEEP_INTERVAL_SEC
+)
+
+
+async def _check_report_owner(
+    db: AsyncSession, report_id: str, owner_id: Optional[int]
+) -> None:
+    """404 si le rapport n'existe pas ou n'est pas à l'appelant."""
+    report = None if report_id.startswith(".") else await get_report(db, report_id)
+    if report is None or report.owner_id != owner_id:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+
+async def _load_transcribed_report(
+    db: AsyncSession, report_id: str, owner_id: Optional[int]
+) -> Tuple[Dict[str, Any], TranscriptIndex]:
+    """Transcription persistée par /transcribe, si le rapport est à l'appelant."""
+    await _check_report_owner(db, report_id, owner_id)
+    report_dir = os.path.join(DATA_ROOT, report_id)
+    saved = await run_in_threadpool(load_transcript_json, report_dir)
+    index = await run_in_threadpool(load_transcript_index, report_dir)
+    if saved is None or index is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    get_storage(DATA_ROOT).touch(report_id)
+    return saved, index
+
+
+def _request_storage_sweep() -> None:
+    """Compteurs en mémoire seulement : balayage anticipé si le quota est dépassé."""
+    if get_storage(DATA_ROOT).over_quota():
+        storage_sweeper.request()
+
+
 @router.post("/transcribe", response_model=TranscribeResponse)
 async def transcribe_endpoint(
+    db: DBSessionDep,
+    principal: OptionalPrincipalDep,
     file: UploadFile = File(...),
     language_hint: str | None = Query(default=None, description="ex: 'fr', 'en'"),
     diarization: str = Query(
         default="none",
-        pattern="^(none|alternate)$",
-        description="none=pas de speaker; alternate=heuristique simple selon pauses",
+        pattern="^(none|alternate|cluster|advanced)$",
+        description=(
+            "none=pas de speaker; alternate=heuristique simple selon pauses; "
+            "cluster=regroupement par embeddings spectraux (CPU, sans modèle); "
+            "advanced=diarisation pyannote en parallèle de l'ASR"
+        ),
     ),
     gap_threshold: float = Query(
         default=1.0,
@@ -43,52 +132,120 @@ async def transcribe_endpoint(
         default=4,
         ge=1,
         le=8,
-        description="Nombre max. de speakers (approximation, round-robin)"
+        description="Nombre max. de speakers (round-robin, plafond pour cluster)",
+    ),
+    merge_turns: bool = Query(
+        default=False,
+        description="Fusionne les segments consécutifs d'un même speaker",
+    ),
+    max_turn_sec: float = Query(
+        default=60.0,
+        ge=5.0,
+        le=600.0,
+        description="durée max. (s) d'un tour fusionné",
+    ),
+    include_text: bool = Query(default=True, description="inclure le texte complet"),
+    include_segments: bool = Query(
+        default=True,
+        description="inclure les segments (sinon : GET segments_url, paginé)",
     ),
 ):
 
     lang_hint_clean=(language_hint or "").strip() if language_hint is not None else ""
     if lang_hint_clean.lower()=="auto":
         lang_hint_clean=""
+    meter = usage.start_meter()
+    fair_scheduler.set_principal(principal.key)
     try:
+        # Upload déjà reçu dans un fichier temporaire : sondé là, avant de le charger
+        plan = await plan_upload(file.file)
         content = await file.read()
-       
-        '''if diarization == "advanced":
+        filename = file.filename or ""
+
+        if diarization == "advanced":
             text, segs, lang = await transcribe_audio_with_advanced_diarization(
                 content,
-                file.filename,
+                filename,
+                lang_hint_clean or None,
+                plan=plan,
+            )
+        elif diarization == "cluster":
+            text, segs, lang = await transcribe_audio_with_clustering(
+                content,
+                filename,
                 lang_hint_clean or None,
+                max_speakers=max_speakers,
+                plan=plan,
             )
         else:
             text, segs, lang = await transcribe_audio(
                 content,
-                file.filename,
+                filename,
                 lang_hint_clean or None,
+                plan=plan,
             )
             if diarization == "alternate":
-                segs = assign_speakers_alternate(
+                segs = assign_speakers_round_robin(
                     segs,
                     gap_threshold=gap_threshold,
-                    max_speakers=2,
-                )'''
-        text, segs, lang = await transcribe_audio(
-            content,
-            file.filename,
-            lang_hint_clean or None,
+                    max_speakers=max_speakers,
+                )
+        source_segments = None
+        if merge_turns:
+            source_segments = segs.to_dicts()
+            segs = merge_speaker_turns(segs, max_duration=max_turn_sec)
+
+        # Transcription persistée : les segments restent consultables par page
+        owner_id = principal.user_id
+        report_id = make_report_id()
+        out_dir = os.path.join(DATA_ROOT, report_id)
+        language = lang or "unknown"
+        segments = segs.to_dicts()
+        saved_transcript: Dict[str, Any] = {
+            "language": language,
+            "text": text or "",
+            "segments": segments,
+        }
+        if source_segments is not None:
+            # Segments ASR d'origine, que les source_range des tours désignent
+            saved_transcript["source_segments"] = source_segments
+        await run_in_threadpool(save_transcript_json, saved_transcript, out_dir)
+        await run_in_threadpool(save_transcript_index, segs, out_dir)
+        await record_report(
+            db,
+            report_id,
+            owner_id=owner_id,
+            language=language,
+            duration_sec=segs.duration,
+            markdown_path=None,
+            pdf_path=None,
         )
-        if diarization == "alternate":
-            segs = assign_speakers_round_robin(
-                segs,
-                gap_threshold=gap_threshold,
-                max_speakers=max_speakers,
-            )
+        await index_report(
+            db, report_id, owner_id=owner_id, segments=segments, summary=None
+        )
+        _request_storage_sweep()
+        usage.ledger.record(
+            "transcribe",
+            meter,
+            user_id=principal.user_id,
+            api_token_id=principal.api_token_id,
+            report_id=report_id,
+        )
+
         transcript = Transcript(
-            language=lang or "unknown",
-            text=text or "",
-            segments=[TranscriptSegment(**s) for s in segs],
+            language=language,
+            text=(text or "") if include_text else None,
+            segments=segs.to_schema() if include_segments else [],
+            segment_count=len(segs),
+        )
+        return TranscribeResponse(
+            transcript=transcript,
+            report_id=report_id,
+            segments_url=f"/reports/{report_id}/segments",
         )
-        return TranscribeResponse(transcript=transcript)
 
+    except AudioRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except TranscriptionError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -97,46 +254,77 @@ async def transcribe_endpoint(
     
 @router.post("/notes", response_model=NotesResponse)
 async def generate_notes_endpoint(
+    db: DBSessionDep,
+    principal: OptionalPrincipalDep,
     file: Optional[UploadFile] = File(default=None),
     transcript: Optional[str] = Form(default=None),
     language_hint: str = Form(default="auto"),
     diarization: str = Form(default="none"),
     gap_threshold: float = Form(default=1.0),
     export_pdf: bool = Form(default=False),
+    include_transcript: bool = Form(default=True),
+    report_id: Optional[str] = Form(
+        default=None,
+        description="rapport créé par /transcribe : notes ajoutées sans re-transcrire",
+    ),
 ):
     """
     Génèration des notes de réunion 
     """
-    if not file and not transcript:
-        raise HTTPException(status_code=400, detail="Provide either 'file' or 'transcript'.")
+    if not file and not transcript and not report_id:
+        raise HTTPException(
+            status_code=400, detail="Provide 'file', 'transcript' or 'report_id'."
+        )
 
     
     lang_hint_clean = (language_hint or "").strip()
     if lang_hint_clean.lower() == "auto":
         lang_hint_clean = ""
 
+    meter = usage.start_meter()
+    fair_scheduler.set_principal(principal.key)
     transcript_text: Optional[str] = None
     lang: Optional[str] = None  
+    duration_sec: Optional[float] = None
+    segments: list = []
+    store = SegmentStore.empty()
+    index: Optional[TranscriptIndex] = None
 
-    if file:
-        content = await file.read()
+    if report_id:
+        saved, index = await _load_transcribed_report(db, report_id, principal.user_id)
+        transcript_text = saved.get("text")
+        segments = saved.get("segments") or []
+        store = index.segments
+        duration_sec = store.duration
+        lang = saved.get("language") or lang_hint_clean or None
+    elif file:
         try:
+            plan = await plan_upload(file.file)
+            content = await file.read()
             text, segs, lang_detected = await transcribe_audio(
                 content,
                 file.filename,
-                lang_hint_clean or None,  
+                lang_hint_clean or None,
+                plan=plan,
             )
             transcript_text = text
+            store = segs
+            segments = segs.to_dicts()
+            duration_sec = segs.duration
             if lang_detected:
                 lang = lang_detected
             elif lang_hint_clean:
                 lang = lang_hint_clean
+        except AudioRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Transcription failed: {e}")
     else:
         try:
             maybe = json.loads(transcript)
             transcript_text = maybe.get("text") or transcript
+            segments = maybe.get("segments") or []
+            store = SegmentStore.from_segments(segments)
         except Exception:
             transcript_text = transcript
 
@@ -154,10 +342,25 @@ async def generate_notes_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Notes generation failed: {e}")
 
-    report_id = make_report_id()
+    owner_id = principal.user_id
+    reused = report_id is not None
+    report_id = report_id or make_report_id()
     out_dir = os.path.join(DATA_ROOT, report_id)
+    if index is None:
+        index = await run_in_threadpool(save_transcript_index, store, out_dir)
+    resolve_topics(summary, index)
     md_text = render_markdown(summary, transcript_text)
     md_path = save_markdown(md_text, out_dir)
+    json_path = os.path.join(out_dir, "transcript.json")
+    if not reused:
+        save_transcript_json(
+            {
+                "language": lang or lang_hint_clean or "unknown",
+                "text": transcript_text,
+                "segments": segments,
+            },
+            out_dir,
+        )
     pdf_path = None
     if export_pdf:
         pdf_path = os.path.join(out_dir, "meeting-report.pdf")
@@ -166,43 +369,183 @@ async def generate_notes_endpoint(
     md_filename = os.path.basename(md_path)
     pdf_filename = os.path.basename(pdf_path) if pdf_path else None
 
+    if reused:
+        # Segments déjà indexés par /transcribe : seul le résumé s'ajoute
+        await attach_exports(
+            db, report_id, lang or lang_hint_clean or None, md_path, pdf_path
+        )
+        await index_report(
+            db, report_id, owner_id=owner_id, segments=[], summary=summary
+        )
+    else:
+        await record_report(
+            db,
+            report_id,
+            owner_id=owner_id,
+            language=lang or lang_hint_clean or None,
+            duration_sec=duration_sec,
+            markdown_path=md_path,
+            pdf_path=pdf_path,
+        )
+        await index_report(
+            db,
+            report_id,
+            owner_id=owner_id,
+            segments=segments,
+            summary=summary,
+        )
+    _request_storage_sweep()
+    usage.ledger.record(
+        "notes",
+        meter,
+        user_id=principal.user_id,
+        api_token_id=principal.api_token_id,
+        report_id=report_id,
+    )
+
     exports = {
         "markdown_path": md_path,
         "pdf_path": pdf_path,
         "markdown_url": f"/reports/files/{report_id}/{md_filename}",
         "pdf_url": f"/reports/files/{report_id}/{pdf_filename}" if pdf_filename else None,
+        "transcript_url": f"/reports/files/{report_id}/{os.path.basename(json_path)}",
+        "bundle_url": f"/reports/files/{report_id}/bundle.zip",
+        "segments_url": f"/reports/{report_id}/segments",
     }
 
     return JSONResponse(
         content=NotesResponse(
             report_id=report_id,
             language=lang or lang_hint_clean or "unknown",
-            transcript_text=transcript_text,
+            transcript_text=transcript_text if include_transcript else None,
             summary=summary,
             exports=exports,
         ).model_dump()
     )
+
+
+@router.get("", response_model=ReportPage)
+async def list_reports(
+    current_user: AuthUserDep,
+    db: DBSessionDep,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor de la page précédente"
+    ),
+) -> ReportPage:
+    """
+    Liste les rapports de l'utilisateur, du plus récent au plus ancien.
+    """
+    try:
+        items, next_cursor = await list_reports_for_user(
+            db, cast(int, current_user.id), limit, cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ReportPage(
+        items=[ReportOut.model_validate(r) for r in items], next_cursor=next_cursor
+    )
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_endpoint(
+    current_user: AuthUserDep,
+    db: DBSessionDep,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> SearchResponse:
+    """
+    Recherche plein texte dans les transcriptions et résumés de l'utilisateur.
+    start_ms / end_ms permettent de sauter au bon moment de l'enregistrement.
+    """
+    hits = await search_reports(db, cast(int, current_user.id), q, limit)
+    return SearchResponse(query=q, hits=[SearchHit(**h) for h in hits])
+
+
+@router.get("/{report_id}/segments", response_model=SegmentsResponse)
+async def get_report_segments(
+    report_id: str,
+    db: DBSessionDep,
+    principal: OptionalPrincipalDep,
+    from_sec: float = Query(default=0.0, ge=0.0, alias="from", description="début (s)"),
+    to_sec: Optional[float] = Query(
+        default=None, ge=0.0, alias="to", description="fin (s)"
+    ),
+    q: Optional[str] = Query(
+        default=None, max_length=200, description="mots à contenir"
+    ),
+    limit: int = Query(default=200, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor de la page précédente"
+    ),
+) -> SegmentsResponse:
+    """
+    Segments de la transcription qui chevauchent [from, to), via l'index du
+    rapport (bisection sur les débuts, listes de postings pour `q`), par pages
+    de `limit` segments. Réservé au propriétaire du rapport (404 sinon).
+    """
+    await _check_report_owner(db, report_id, principal.user_id)
+    report_dir = os.path.join(DATA_ROOT, report_id)
+    index = await run_in_threadpool(load_transcript_index, report_dir)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    indices = index.between(from_sec, float("inf") if to_sec is None else to_sec)
+    if q:
+        indices = np.intersect1d(indices, index.matching(q))
+    if cursor:
+        try:
+            after = decode_segment_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        indices = indices[indices > after]
+    page = indices[:limit]
+    next_cursor = encode_segment_cursor(int(page[-1])) if len(indices) > limit else None
+
+    get_storage(DATA_ROOT).touch(report_id)
+    return SegmentsResponse(
+        report_id=report_id,
+        indices=page.tolist(),
+        segments=index.segments.take(page).to_schema(),
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/files/{report_id}/bundle.zip")
+async def download_report_bundle(report_id: str) -> StreamingResponse:
+    """
+    Archive ZIP de tous les artefacts du rapport (Markdown, PDF, transcription JSON,
+    sous-titres...), générée en flux : rien n'est construit en mémoire ni sur disque.
+    """
+    report_dir = os.path.join(DATA_ROOT, report_id)
+    if report_id.startswith(".") or not os.path.isdir(report_dir):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    get_storage(DATA_ROOT).touch(report_id)
+    return StreamingResponse(
+        iter_zip_bundle(report_dir),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{report_id}.zip"'},
+    )
+
+
 @router.get("/files/{report_id}/{filename}")
-async def download_report_file(report_id: str, filename: str):
+async def download_report_file(
+    report_id: str, filename: str, request: Request
+) -> Response:
     """
     Sert un fichier de rapport (Markdown ou PDF) pour téléchargement.
     Utilisé par les URLs markdown_url / pdf_url renvoyées à Streamlit.
+    Sert la variante .br/.gz si le client l'accepte, avec ETag fort,
+    If-None-Match (304) et Range (206).
     """
+    if report_id.startswith(".") or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="File not found")
+
     file_path = os.path.join(DATA_ROOT, report_id, filename)
 
     if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="File not found")
 
-    # Déterminer le type MIME
-    if filename.endswith(".pdf"):
-        media_type = "application/pdf"
-    elif filename.endswith(".md"):
-        media_type = "text/markdown"
-    else:
-        media_type = "application/octet-stream"
-
-    return FileResponse(
-        file_path,
-        media_type=media_type,
-        filename=filename,
-    )
+    get_storage(DATA_ROOT).touch(report_id)
+    return build_file_response(request, file_path, filename)
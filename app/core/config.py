@@ -21,13 +21,56 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Cache des utilisateurs authentifiés (TTL plafonné par l'exp du jeton)
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_SIZE: int = 10000
+    # Hachage bcrypt : coût, threads dédiés, file d'attente max avant 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
     '''HF_API_TOKEN: str | None = None
     ASR_MODEL_ID: str = "openai/whisper-large-v3-turbo"
     BACKEND: str = "hf"'''
     OPENAI_API_KEY: str | None = None
     ASR_MODEL_ID: str = "gpt-4o-mini-transcribe"   # ou "whisper-1"
     BACKEND: str = "openai"
-
+    # Appels ASR : pool global partagé équitablement entre principaux (DRR)
+    ASR_WORKERS: int = 4
+    ASR_SCHEDULER_QUANTUM_SEC: float = 60.0
+    # Voie rapide des clips courts (0 = désactivée) et ses créneaux réservés
+    ASR_FAST_LANE_MAX_SEC: float = 30.0
+    ASR_FAST_LANE_SLOTS: int = 2
+    # Préflight : refus avant décodage (0 = illimité), sur ses propres threads
+    ASR_PREFLIGHT_WORKERS: int = 2
+    ASR_MAX_UPLOAD_MB: int = 500
+    ASR_MAX_AUDIO_SEC: float = 4 * 3600
+    # Encodage des chunks envoyés à l'ASR : wav | flac | opus | mp3 (+ débit).
+    # Opus 24k : ~3 ko/s, chunks plafonnés par ASR_MAX_CHUNK_SEC, pas par MAX_BYTES
+    ASR_UPLOAD_CODEC: str = "opus"
+    ASR_UPLOAD_BITRATE: str = "24k"
+    # Durée max. d'un chunk acceptée par le modèle (gpt-4o-*-transcribe : 1500 s)
+    ASR_MAX_CHUNK_SEC: float = 1400
+
+    # Diarisation (pyannote)
+    HUGGINGFACE_TOKEN: str | None = None
+    DIARIZATION_MODEL_ID: str = "pyannote/speaker-diarization"
+    # Processus dédiés, pipeline chargé au démarrage de l'API
+    DIARIZATION_WORKER: bool = False
+    DIARIZATION_WORKERS: int = 1
+    # Threads torch par processus (0 = défaut torch)
+    DIARIZATION_NUM_THREADS: int = 1
+    # Diarisation par fenêtres pour les longs enregistrements (0 = désactivée)
+    DIARIZATION_WINDOW_SEC: float = 600
+    DIARIZATION_WINDOW_OVERLAP_SEC: float = 30
+    # Cache des résultats : entrées en mémoire, répertoire .npz (vide = mémoire seule)
+    DIARIZATION_CACHE_SIZE: int = 64
+    DIARIZATION_CACHE_DIR: str | None = None
+
+    # Report storage (0 = illimité)
+    REPORT_RETENTION_DAYS: int = 0
+    REPORT_STORAGE_QUOTA_MB: int = 0
+    # Balayage rétention / quota en tâche de fond (s)
+    REPORT_SWEEP_INTERVAL_SEC: float = 300
 
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -59,6 +102,24 @@ class Settings(BaseSettings):
     DB_PORT: str = os.getenv("DB_PORT", "")
     DB_NAME: str = os.getenv("DB_NAME", "db.sqlite3")
 
+    # Profil du moteur : pool (SQLite fichier et PostgreSQL)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg : taille du cache de requêtes préparées par connexion
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # SQLite : WAL + synchronous=NORMAL, attente sur verrou (ms)
+    SQLITE_WAL: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Registre de consommation : écriture groupée en tâche de fond
+    USAGE_FLUSH_INTERVAL_SEC: float = 5.0
+    USAGE_BATCH_SIZE: int = 500
+    USAGE_BUFFER_MAX: int = 50000
+
     @property
     def DATABASE_URL(self) -> str:
         """Construct database URL based on configuration."""
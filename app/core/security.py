@@ -2,16 +2,34 @@
 Security utilities for authentication and authorization.
 """
 
+import asyncio
+import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union, cast
+from typing import Any, Callable, Optional, Tuple, TypeVar, Union, cast
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. Changing BCRYPT_ROUNDS rehashes passwords at login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt libère le GIL : un petit pool dédié garde la boucle d'événements libre
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+_pending = 0
+
+_T = TypeVar("_T")
+
+
+class PasswordHashingOverloaded(Exception):
+    """Too many password hashes queued: the request should be shed (503)."""
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,6 +42,46 @@ def get_password_hash(password: str) -> str:
     return cast(str, pwd_context.hash(password))
 
 
+async def _run_hashing(func: Callable[..., _T], *args: Any) -> _T:
+    global _pending
+    limit = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+    if _pending >= limit:
+        raise PasswordHashingOverloaded("Password hashing queue is full")
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash if the stored one is outdated."""
+    return cast(
+        Tuple[bool, Optional[str]],
+        await _run_hashing(
+            pwd_context.verify_and_update, plain_password, hashed_password
+        ),
+    )
+
+
+def hash_api_token(token: str) -> str:
+    """Keyed hash (HMAC-SHA256) under which API tokens are stored and looked up."""
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), token.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
 def create_access_token(
     subject: Union[str, Any], user_id: str, expires_delta: Optional[timedelta] = None
 ) -> str:
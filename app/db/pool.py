@@ -0,0 +1,52 @@
+"""
+Connection pool instrumentation.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout counts and wait times."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            checkouts = self.checkouts
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": max(0, self.overflow()),
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": (
+                    round(1000 * self.wait_total / checkouts, 3) if checkouts else 0.0
+                ),
+                "wait_max_ms": round(1000 * self.wait_max, 3),
+            }
@@ -3,8 +3,10 @@ Database session management.
 """
 
 import contextlib
-from typing import Any, AsyncGenerator, AsyncIterator
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
     AsyncSession,
@@ -13,13 +15,61 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncQueuePool
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Options create_async_engine selon le moteur (profil défini dans Settings)."""
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        return options  # StaticPool : une seule connexion partagée
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if parsed.get_dialect().driver == "asyncpg":
+        # Cache de requêtes préparées côté asyncpg (0 derrière pgbouncer)
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        # WAL : lecteurs et écrivain ne se bloquent plus ; NORMAL suffit en WAL
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
 
 
 class DatabaseSessionManager:
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}):
+    def __init__(self, host: str, engine_kwargs: Optional[dict[str, Any]] = None):
+        if engine_kwargs is None:
+            engine_kwargs = engine_options(host)
         self._engine = create_async_engine(host, **engine_kwargs)
+        if self._engine.dialect.name == "sqlite":
+            event.listen(self._engine.sync_engine, "connect", _set_sqlite_pragmas)
         self._sessionmaker = async_sessionmaker(autocommit=False, bind=self._engine)
 
+    def pool_stats(self) -> Dict[str, Any]:
+        pool = self._engine.pool if self._engine is not None else None
+        if isinstance(pool, InstrumentedAsyncQueuePool):
+            return pool.stats()
+        return {}
+
     async def close(self) -> None:
         if self._engine is None:
             raise Exception("DatabaseSessionManager is not initialized")
@@ -55,10 +105,7 @@ class DatabaseSessionManager:
             await session.close()
 
 
-sessionmanager = DatabaseSessionManager(
-    settings.DATABASE_URL,
-    # {"echo": settings.echo_sql}
-)
+sessionmanager = DatabaseSessionManager(settings.DATABASE_URL)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -7,6 +7,8 @@ class Topic(BaseModel):
     description: Optional[str] = None
     start: Optional[str] = None  # "HH:MM:SS" si disponible
     end: Optional[str] = None
+    # Renseigné côté serveur : segments [début, fin) couverts par start/end
+    segment_range: Optional[List[int]] = None
 
 
 class ActionItem(BaseModel):
@@ -28,6 +30,6 @@ class MeetingSummary(BaseModel):
 class NotesResponse(BaseModel):
     report_id: str
     language: str
-    transcript_text: str
+    transcript_text: Optional[str] = None
     summary: MeetingSummary
     exports: Dict[str, Optional[str]]
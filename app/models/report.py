@@ -0,0 +1,98 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+)
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class Report(Base):
+    __tablename__ = "reports"
+
+    # Même identifiant que le dossier sous DATA_ROOT (make_report_id)
+    id = Column(String(64), primary_key=True)
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+    )
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+    duration_sec = Column(Float, nullable=True)
+    language = Column(String(16), nullable=True)
+    markdown_path = Column(String, nullable=True)
+    pdf_path = Column(String, nullable=True)
+
+    owner = relationship("User")
+
+    __table_args__ = (
+        # Listing par utilisateur, pagination keyset sur (created_at, id) décroissants
+        Index("ix_reports_owner_created", "owner_id", "created_at", "id"),
+    )
+
+
+class ReportSearchEntry(Base):
+    """Unité indexée en plein texte : un segment de transcription ou un champ du résumé."""
+
+    __tablename__ = "report_search_entries"
+
+    id = Column(Integer, primary_key=True)
+    report_id = Column(
+        String(64), ForeignKey("reports.id", ondelete="CASCADE"), nullable=False
+    )
+    # Dénormalisé depuis reports.owner_id pour filtrer sans jointure
+    owner_id = Column(Integer, nullable=True)
+    kind = Column(String(32), nullable=False)
+    speaker = Column(String, nullable=True)
+    start_ms = Column(Integer, nullable=True)
+    end_ms = Column(Integer, nullable=True)
+    text = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_report_search_entries_report", "report_id"),
+        Index("ix_report_search_entries_owner", "owner_id"),
+    )
+
+
+# Index FTS5 "external content" sur report_search_entries, tenu à jour par triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS report_search_fts USING fts5("
+    "text, content='report_search_entries', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS report_search_ai AFTER INSERT ON report_search_entries "
+    "BEGIN INSERT INTO report_search_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS report_search_ad AFTER DELETE ON report_search_entries "
+    "BEGIN INSERT INTO report_search_fts(report_search_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+]
+
+for _statement in SQLITE_FTS_DDL:
+    event.listen(
+        ReportSearchEntry.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    ReportSearchEntry.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_report_search_entries_tsv "
+        "ON report_search_entries USING gin (to_tsvector('simple', text))"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    ReportSearchEntry.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS report_search_fts").execute_if(dialect="sqlite"),
+)
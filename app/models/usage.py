@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
+
+from app.db.base import Base
+
+
+class UsageRecord(Base):
+    """Consommation d'une requête : secondes d'audio, chunks ASR, tokens LLM."""
+
+    __tablename__ = "usage_records"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Pas de clé étrangère : le registre survit aux comptes et jetons supprimés
+    user_id = Column(Integer, nullable=True)
+    api_token_id = Column(Integer, nullable=True)
+    endpoint = Column(String(32), nullable=False)
+    report_id = Column(String(64), nullable=True)
+    audio_sec = Column(Float, nullable=False, default=0.0)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    asr_latency_ms = Column(Float, nullable=False, default=0.0)
+    llm_model = Column(String(64), nullable=True)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Agrégats par utilisateur / par jeton sur une période
+        Index("ix_usage_records_user_created", "user_id", "created_at"),
+        Index("ix_usage_records_token_created", "api_token_id", "created_at"),
+    )
@@ -1,16 +1,57 @@
+from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class TranscriptSegment(BaseModel):
     start: float
     end: float
     text: str
     speaker: Optional[str] = None
+    # Tours fusionnés : indices [début, fin) dans transcript.json "source_segments"
+    source_range: Optional[List[int]] = None
 
 class Transcript(BaseModel):
     language: str
-    text: str
+    # None / liste vide si exclus de la réponse (include_text / include_segments)
+    text: Optional[str] = None
+    segments: List[TranscriptSegment] = Field(default_factory=list)
+    segment_count: int = 0
+
+class SegmentsResponse(BaseModel):
+    report_id: str
+    # Indices dans la transcription triée par début
+    indices: List[int] = Field(default_factory=list)
     segments: List[TranscriptSegment] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
 
 class TranscribeResponse(BaseModel):
     transcript: Transcript
+    report_id: Optional[str] = None
+    segments_url: Optional[str] = None
+
+class ReportOut(BaseModel):
+    id: str
+    created_at: datetime
+    updated_at: datetime
+    duration_sec: Optional[float] = None
+    language: Optional[str] = None
+    markdown_path: Optional[str] = None
+    pdf_path: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class ReportPage(BaseModel):
+    items: List[ReportOut] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+class SearchHit(BaseModel):
+    report_id: str
+    kind: str
+    snippet: str
+    speaker: Optional[str] = None
+    start_ms: Optional[int] = None
+    end_ms: Optional[int] = None
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: List[SearchHit] = Field(default_factory=list)
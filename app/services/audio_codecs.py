@@ -0,0 +1,75 @@
+"""
+Upload codecs for ASR chunks.
+
+Chunks sent to the ASR API are re-encoded from the decoded 16 kHz mono
+audio. Each codec carries a conservative bytes-per-second estimate, from
+which the planner derives the longest chunk that still fits MAX_BYTES:
+about 12 minutes for WAV, 15 for FLAC, and the model duration cap
+(ASR_MAX_CHUNK_SEC) for Opus/MP3 at speech bitrates.
+"""
+
+import io
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from pydub import AudioSegment
+
+from app.core.config import settings
+
+# PCM 16 bits, 16 kHz, mono
+PCM_BYTES_PER_SEC = 16000 * 2
+
+# Marge pour les en-têtes, les pages Ogg / trames MP3 et la variabilité du débit
+_SAFETY = 0.9
+
+
+@dataclass(frozen=True)
+class UploadCodec:
+    name: str
+    format: str  # format pydub/ffmpeg, et extension envoyée à l'API
+    bytes_per_sec: float
+    export_args: Dict[str, Any] = field(default_factory=dict)
+
+    def export(self, seg: AudioSegment) -> bytes:
+        out = io.BytesIO()
+        seg.export(out, format=self.format, **self.export_args)
+        return out.getvalue()
+
+    def max_chunk_sec(self, max_bytes: int) -> int:
+        """Plus longue durée (s) dont l'export tient dans max_bytes, plafonnée par le modèle."""
+        fits = int(max_bytes * _SAFETY / self.bytes_per_sec)
+        return max(1, min(fits, int(settings.ASR_MAX_CHUNK_SEC)))
+
+
+def _bitrate_bps(bitrate: str) -> int:
+    value = bitrate.strip().lower()
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+def get_codec(name: Optional[str] = None, bitrate: Optional[str] = None) -> UploadCodec:
+    """Codec configuré (ASR_UPLOAD_CODEC / ASR_UPLOAD_BITRATE) ou demandé."""
+    name = (name or settings.ASR_UPLOAD_CODEC).lower()
+    bitrate = bitrate or settings.ASR_UPLOAD_BITRATE
+    if name == "wav":
+        return UploadCodec("wav", "wav", PCM_BYTES_PER_SEC)
+    if name == "flac":
+        # Sans perte ; la parole se compresse d'environ moitié, estimé à 75 %
+        return UploadCodec("flac", "flac", PCM_BYTES_PER_SEC * 0.75)
+    if name == "opus":
+        return UploadCodec(
+            "opus",
+            "ogg",
+            _bitrate_bps(bitrate) / 8,
+            {
+                "codec": "libopus",
+                "bitrate": bitrate,
+                "parameters": ["-application", "voip"],
+            },
+        )
+    if name == "mp3":
+        return UploadCodec(
+            "mp3", "mp3", _bitrate_bps(bitrate) / 8, {"bitrate": bitrate}
+        )
+    raise ValueError(f"Unsupported ASR_UPLOAD_CODEC: {name}")
@@ -0,0 +1,203 @@
+"""
+Audio container probing without decoding.
+
+Works on the upload as a seekable binary file (the request's spooled
+temporary file), never on its full contents in memory. RIFF/WAVE headers
+are parsed in Python from the first WAV_HEAD_BYTES; other containers fall
+back to ffprobe, which opens the spool itself (seekable, so MP4/M4A with a
+trailing `moov` atom are read too). Returns None when the format cannot be
+identified; `duration_sec` is None when neither the container nor the
+stream states it (WebM from MediaRecorder).
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from pydub.utils import which
+
+# Codecs acceptés tels quels par l'API, par conteneur. Le nom du conteneur ne
+# suffit pas : ffprobe annonce « mov,mp4,… » pour le 3GP (AMR) ou l'ALAC, et
+# « matroska,webm » pour tout MKV.
+API_CODECS = {
+    # Noms de probe_wav, puis ceux de ffprobe (RF64, WAV mal formé)
+    "wav": (
+        "pcm_8",
+        "pcm_16",
+        "pcm_24",
+        "pcm_32",
+        "pcm_u8",
+        "pcm_s16le",
+        "pcm_s24le",
+        "pcm_s32le",
+    ),
+    "mp3": ("mp3",),
+    "flac": ("flac",),
+    "ogg": ("opus", "vorbis", "flac"),
+    "webm": ("opus", "vorbis"),
+    "mp4": ("aac", "mp3"),
+    "m4a": ("aac", "mp3"),
+}
+API_CONTAINERS = tuple(API_CODECS)
+
+FFPROBE_TIMEOUT_SEC = 10
+
+# En-tête WAV lu en Python : fmt, data et les chunks usuels (LIST, bext)
+WAV_HEAD_BYTES = 64 * 1024
+
+# Formats WAV courants (champ wFormatTag)
+_WAV_CODECS = {
+    1: "pcm",
+    3: "pcm_float",
+    6: "pcm_alaw",
+    7: "pcm_mulaw",
+    0xFFFE: "extensible",
+}
+
+
+@dataclass(frozen=True)
+class PcmLayout:
+    """Échantillons PCM entiers d'un WAV : format et position, pour les découper."""
+
+    sample_rate: int
+    channels: int
+    bits_per_sample: int
+    block_align: int
+    data_offset: int
+    data_size: int
+
+
+@dataclass
+class AudioInfo:
+    container: str
+    duration_sec: Optional[float]
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    codec: Optional[str] = None
+    # WAV PCM seulement : découpable sans décodage
+    pcm: Optional[PcmLayout] = None
+
+
+def ffprobe_available() -> bool:
+    return which("ffprobe") is not None
+
+
+def probe_wav(data: bytes, total_size: Optional[int] = None) -> Optional[AudioInfo]:
+    """
+    Durée d'un WAV d'après ses chunks `fmt ` et `data`. `data` peut n'être que
+    le début du fichier, dont `total_size` donne alors la taille complète.
+    """
+    end = len(data) if total_size is None else total_size
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    pos = 12
+    tag = channels = sample_rate = byte_rate = block_align = bits = 0
+    while pos + 8 <= len(data):
+        chunk_id = data[pos : pos + 4]
+        (size,) = struct.unpack_from("<I", data, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt " and size >= 16 and body + 16 <= len(data):
+            tag, channels, sample_rate, byte_rate, block_align, bits = (
+                struct.unpack_from("<HHIIHH", data, body)
+            )
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Écrivains en flux : taille 0 ou 0xFFFFFFFF, on borne au fichier reçu
+            size = end - body if size in (0, 0xFFFFFFFF) else min(size, end - body)
+            codec = _WAV_CODECS.get(tag, f"wav_0x{tag:04x}")
+            if codec in ("pcm", "pcm_float"):
+                codec = f"{codec}_{bits}"
+            pcm = None
+            if tag == 1 and block_align:
+                pcm = PcmLayout(sample_rate, channels, bits, block_align, body, size)
+            return AudioInfo("wav", size / byte_rate, sample_rate, channels, codec, pcm)
+        pos = body + size + (size & 1)
+    return None
+
+
+@contextlib.contextmanager
+def _ffprobe_path(source: BinaryIO) -> Iterator[Tuple[str, Tuple[int, ...]]]:
+    """
+    Chemin lisible par ffprobe (et descripteurs à lui transmettre) : le fichier
+    du spool via /dev/fd, sinon une copie temporaire (BytesIO).
+    """
+    try:
+        fd = source.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fd = -1
+    if fd >= 0 and os.path.exists(f"/dev/fd/{fd}"):
+        yield f"/dev/fd/{fd}", (fd,)
+        return
+    with tempfile.NamedTemporaryFile(suffix=".upload") as spool:
+        source.seek(0)
+        shutil.copyfileobj(source, spool)
+        spool.flush()
+        yield spool.name, ()
+
+
+def _duration(fmt: dict, stream: dict) -> Optional[float]:
+    """Durée du conteneur, sinon de la piste ; None si aucune n'est annoncée."""
+    for value in (fmt.get("duration"), stream.get("duration")):
+        with contextlib.suppress(TypeError, ValueError):
+            return float(str(value))
+    return None
+
+
+def probe_ffprobe(source: BinaryIO) -> Optional[AudioInfo]:
+    ffprobe = which("ffprobe")
+    if not ffprobe:
+        return None
+    entries = (
+        "format=format_name,duration:stream=codec_name,sample_rate,channels,duration"
+    )
+    try:
+        with _ffprobe_path(source) as (path, fds):
+            out = subprocess.run(
+                [ffprobe, "-v", "error", "-select_streams", "a:0"]
+                + ["-show_entries", entries, "-of", "json", path],
+                capture_output=True,
+                timeout=FFPROBE_TIMEOUT_SEC,
+                check=True,
+                pass_fds=fds,
+            ).stdout
+        parsed = json.loads(out)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    fmt = parsed.get("format") or {}
+    streams = parsed.get("streams") or []
+    if not fmt or not streams:
+        return None  # format inconnu ou pas de piste audio
+    stream = streams[0]
+    names = (fmt.get("format_name") or "").split(",")
+    container = next((n for n in names if n in API_CONTAINERS), names[0] or "unknown")
+    sample_rate = int(stream["sample_rate"]) if stream.get("sample_rate") else None
+    return AudioInfo(
+        container,
+        _duration(fmt, stream),
+        sample_rate,
+        stream.get("channels"),
+        stream.get("codec_name"),
+    )
+
+
+def api_compatible(info: AudioInfo) -> bool:
+    """Fichier envoyable tel quel à l'API : conteneur et codec reconnus."""
+    return info.codec in API_CODECS.get(info.container, ())
+
+
+def probe(source: BinaryIO) -> Optional[AudioInfo]:
+    """Sonde un fichier binaire positionnable ; le laisse positionné au début."""
+    try:
+        size = source.seek(0, os.SEEK_END)
+        source.seek(0)
+        return probe_wav(source.read(WAV_HEAD_BYTES), size) or probe_ffprobe(source)
+    finally:
+        source.seek(0)
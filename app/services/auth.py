@@ -10,7 +10,11 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.security import create_access_token, create_refresh_token, verify_password
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    verify_and_update_password,
+)
 from app.models.user import User
 from app.schemas.token import TokenPayload
 
@@ -18,11 +22,24 @@ from app.schemas.token import TokenPayload
 async def authenticate_user(
     db: AsyncSession, username: str, password: str
 ) -> Optional[User]:
-    """Authenticate a user by username and password."""
+    """
+    Authenticate a user by username and password.
+    The hash is upgraded in place when the hashing parameters changed.
+    """
     result = await db.execute(select(User).filter(User.username == username))
     user = cast(Optional[User], result.scalar_one_or_none())
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
         return None
+    valid, new_hash = await verify_and_update_password(
+        password, cast(str, user.hashed_password)
+    )
+    if not valid:
+        return None
+    if new_hash:
+        # Par l'ORM, pour que after_update invalide le cache des principaux
+        setattr(user, "hashed_password", new_hash)
+        await db.commit()
+        await db.refresh(user)
     return user
 
 
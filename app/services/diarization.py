@@ -1,42 +1,71 @@
-import os
-import tempfile
-from typing import List, Dict, Any
+import heapq
+import io
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Sequence, Tuple
 
-from pyannote.audio import Pipeline
+import numpy as np
+from pydub import AudioSegment
+
+from app.core.config import settings
+from app.services import diarization_cache
+from app.services.speaker_clustering import segment_embedding
+from app.services.windowed_diarization import diarize_windowed
+
+if TYPE_CHECKING:
+    from pyannote.audio import Pipeline
+
+SAMPLE_RATE = 16000
 
 _pipeline = None
 
-def get_diarization_pipeline() -> Pipeline:
+def load_diarization_pipeline() -> "Pipeline":
+    """Charge pyannote (lent : téléchargement / init des modèles)."""
+    # Import tardif : pyannote (torch) n'est requis que pour le mode avancé
+    import torch
+    from pyannote.audio import Pipeline
+
+    hf_token = settings.HUGGINGFACE_TOKEN
+    if not hf_token:
+        raise RuntimeError("HUGGINGFACE_TOKEN is not set in environment.")
+    if settings.DIARIZATION_NUM_THREADS > 0:
+        torch.set_num_threads(settings.DIARIZATION_NUM_THREADS)
+    return Pipeline.from_pretrained(
+        settings.DIARIZATION_MODEL_ID,
+        use_auth_token=hf_token,
+    )
+
+
+def get_diarization_pipeline() -> "Pipeline":
     global _pipeline
     if _pipeline is None:
-        hf_token = os.getenv("HUGGINGFACE_TOKEN")
-        if not hf_token:
-            raise RuntimeError("HUGGINGFACE_TOKEN is not set in environment.")
-        _pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization",
-            use_auth_token=hf_token,
-        )
+        _pipeline = load_diarization_pipeline()
     return _pipeline
 
 
-def diarize_audio_bytes(audio_bytes: bytes, file_suffix: str = ".wav") -> List[Dict[str, Any]]:
+def audio_to_samples(audio: AudioSegment) -> np.ndarray:
+    """AudioSegment -> PCM int16 mono 16 kHz (vue sur les données brutes)."""
+    audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype=np.int16)
+
+
+def run_pipeline(
+    pipeline: "Pipeline", samples: np.ndarray, sample_rate: int = SAMPLE_RATE
+) -> List[Dict[str, Any]]:
     """
-    Prend des bytes audio, les écrit dans un fichier temporaire,
-    applique pyannote, et renvoie une liste de segments :
+    Applique pyannote sur une forme d'onde en mémoire (pas de fichier temporaire,
+    pas de second décodage) et renvoie une liste de segments :
     [
       {"start": float, "end": float, "speaker": "SPEAKER_00"},
       ...
     ]
     """
-    pipeline = get_diarization_pipeline()
+    import torch
 
-    # audio dans un fichier temporaire
-    with tempfile.NamedTemporaryFile(suffix=file_suffix, delete=True) as tmp:
-        tmp.write(audio_bytes)
-        tmp.flush()
+    waveform = torch.from_numpy(samples.astype(np.float32) / 32768.0).unsqueeze(0)
+    diarization = pipeline({"waveform": waveform, "sample_rate": sample_rate})
+    return _annotation_to_segments(diarization)
 
-        diarization = pipeline(tmp.name)
 
+def _annotation_to_segments(diarization: Any) -> List[Dict[str, Any]]:
     segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
         segments.append(
@@ -49,6 +78,187 @@ def diarize_audio_bytes(audio_bytes: bytes, file_suffix: str = ".wav") -> List[D
     return segments
 
 
+def _spectral_speaker_embeddings(
+    samples: np.ndarray, turns: List[Dict[str, Any]], sample_rate: int
+) -> Dict[str, np.ndarray]:
+    """Repli sans embeddings pyannote : MFCC sur (au plus) 60 s de parole par speaker."""
+    budget = 60 * sample_rate
+    pieces: Dict[str, List[np.ndarray]] = {}
+    for t in turns:
+        chunks = pieces.setdefault(t["speaker"], [])
+        used = sum(len(c) for c in chunks)
+        if used < budget:
+            a = int(t["start"] * sample_rate)
+            b = min(int(t["end"] * sample_rate), a + budget - used)
+            chunks.append(samples[a:b])
+    embeddings = {}
+    for label, chunks in pieces.items():
+        emb = segment_embedding(np.concatenate(chunks)) if chunks else None
+        if emb is not None:
+            embeddings[label] = emb
+    return embeddings
+
+
+def run_pipeline_with_embeddings(
+    pipeline: "Pipeline", samples: np.ndarray, sample_rate: int = SAMPLE_RATE
+) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]:
+    """
+    Comme run_pipeline, avec un embedding par speaker local (centroïdes pyannote
+    si le pipeline sait les renvoyer, sinon embedding spectral).
+    """
+    import torch
+
+    waveform = torch.from_numpy(samples.astype(np.float32) / 32768.0).unsqueeze(0)
+    file = {"waveform": waveform, "sample_rate": sample_rate}
+    try:
+        diarization, centroids = pipeline(file, return_embeddings=True)
+    except TypeError:
+        diarization, centroids = pipeline(file), None
+
+    turns = _annotation_to_segments(diarization)
+    if centroids is not None:
+        embeddings = {
+            str(label): np.asarray(centroids[k], dtype=np.float64)
+            for k, label in enumerate(diarization.labels())
+            if k < len(centroids) and np.all(np.isfinite(centroids[k]))
+        }
+        if all(t["speaker"] in embeddings for t in turns):
+            return turns, embeddings
+    return turns, _spectral_speaker_embeddings(samples, turns, sample_rate)
+
+
+def diarize_windows(
+    windows: Sequence[np.ndarray], sample_rate: int = SAMPLE_RATE
+) -> List[Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]]:
+    """Diarise des fenêtres, en parallèle sur le pool résident s'il tourne."""
+    from app.services import diarization_worker
+
+    if diarization_worker.is_running():
+        return diarization_worker.diarize_windows(windows, sample_rate)
+    pipeline = get_diarization_pipeline()
+    return [run_pipeline_with_embeddings(pipeline, w, sample_rate) for w in windows]
+
+
+def diarize_samples(
+    samples: np.ndarray, sample_rate: int = SAMPLE_RATE
+) -> List[Dict[str, Any]]:
+    """
+    Diarise une forme d'onde int16 mono. Passe par le worker résident s'il est
+    démarré, sinon charge le pipeline dans le processus courant. Au-delà de
+    DIARIZATION_WINDOW_SEC, diarisation par fenêtres chevauchantes.
+    """
+    from app.services import diarization_worker
+
+    window_sec = settings.DIARIZATION_WINDOW_SEC
+    if window_sec > 0 and len(samples) > window_sec * sample_rate:
+        return diarize_windowed(
+            samples,
+            sample_rate,
+            window_sec,
+            settings.DIARIZATION_WINDOW_OVERLAP_SEC,
+            diarize_windows,
+        )
+    if diarization_worker.is_running():
+        return diarization_worker.diarize(samples, sample_rate)
+    return run_pipeline(get_diarization_pipeline(), samples, sample_rate)
+
+
+def diarize_audio_bytes(
+    audio_bytes: bytes, file_suffix: str = ".wav"
+) -> List[Dict[str, Any]]:
+    """
+    Prend des bytes audio, les décode en mémoire et applique pyannote.
+    Un fichier déjà diarisé est servi depuis le cache, sans décodage.
+    """
+    key = diarization_cache.cache_key(audio_bytes)
+    cached = diarization_cache.get(key)
+    if cached is not None:
+        return cached
+
+    buf = io.BytesIO(audio_bytes)
+    buf.name = f"audio{file_suffix}"
+    return diarize_audio(AudioSegment.from_file(buf), cache_key=key)
+
+
+def diarize_audio(
+    audio: AudioSegment, cache_key: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Diarise un audio déjà décodé (celui passé à l'ASR).
+    `cache_key` : diarization_cache.cache_key() des bytes d'origine.
+    """
+    if cache_key is not None:
+        cached = diarization_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    turns = diarize_samples(audio_to_samples(audio))
+    if cache_key is not None:
+        diarization_cache.put(cache_key, turns)
+    return turns
+
+
+def best_overlap_indices(
+    starts: Sequence[float],
+    ends: Sequence[float],
+    turn_starts: Sequence[float],
+    turn_ends: Sequence[float],
+) -> List[int]:
+    """
+    Pour chaque intervalle [starts[i], ends[i]], indice du tour de parole qui le
+    chevauche le plus (-1 si aucun chevauchement > 0). À égalité, le premier tour
+    de la liste l'emporte, comme dans un balayage naïf.
+
+    Balayage : textes et tours triés par début ; un tas (fin, indice) garde les
+    tours encore actifs. O((n + m) log m + somme des tours actifs) au lieu de O(n·m).
+    """
+    n, m = len(starts), len(turn_starts)
+    best = [-1] * n
+    if n == 0 or m == 0:
+        return best
+
+    turn_order = sorted(range(m), key=turn_starts.__getitem__)
+    text_order = sorted(range(n), key=starts.__getitem__)
+    active: List[tuple] = []
+    p = 0
+
+    for i in text_order:
+        ts = starts[i]
+        te = ends[i]
+        while p < m and turn_starts[turn_order[p]] < te:
+            k = turn_order[p]
+            heapq.heappush(active, (turn_ends[k], k))
+            p += 1
+        # Les débuts de texte sont croissants : un tour fini avant ts ne servira plus
+        while active and active[0][0] <= ts:
+            heapq.heappop(active)
+
+        best_k = -1
+        best_ov = 0.0
+        for b_end, k in active:
+            ov = min(te, b_end) - max(ts, turn_starts[k])
+            if ov > best_ov or (ov == best_ov and best_k != -1 and k < best_k):
+                best_ov = ov
+                best_k = k
+        best[i] = best_k
+
+    return best
+
+
+def overlap_speaker_labels(
+    starts: Sequence[float],
+    ends: Sequence[float],
+    speaker_segments: List[Dict[str, Any]],
+) -> List[str]:
+    """Speaker de chevauchement max pour chaque intervalle ("UNKNOWN" si aucun)."""
+    best = best_overlap_indices(
+        list(map(float, starts)),
+        list(map(float, ends)),
+        [float(sp["start"]) for sp in speaker_segments],
+        [float(sp["end"]) for sp in speaker_segments],
+    )
+    return [speaker_segments[k]["speaker"] if k >= 0 else "UNKNOWN" for k in best]
+
+
 def assign_speakers_by_overlap(
     text_segments: List[Dict[str, Any]],
     speaker_segments: List[Dict[str, Any]],
@@ -59,29 +269,14 @@ def assign_speakers_by_overlap(
     - text_segments: ce qui vient de Whisper
     - speaker_segments: ce qui vient de pyannote (start, end, speaker)
     """
-    def overlap(a_start, a_end, b_start, b_end) -> float:
-        return max(0.0, min(a_end, b_end) - max(a_start, b_start))
+    starts = [float(seg.get("start", 0.0)) for seg in text_segments]
+    ends = [float(seg.get("end", ts)) for seg, ts in zip(text_segments, starts)]
+    labels = overlap_speaker_labels(starts, ends, speaker_segments)
 
     results = []
-    for seg in text_segments:
-        ts = float(seg.get("start", 0.0))
-        te = float(seg.get("end", ts))
-        best_speaker = None
-        best_ov = 0.0
-
-        for sp in speaker_segments:
-            ov = overlap(ts, te, sp["start"], sp["end"])
-            if ov > best_ov:
-                best_ov = ov
-                best_speaker = sp["speaker"]
-
+    for seg, speaker in zip(text_segments, labels):
         new_seg = dict(seg)
-        if best_speaker is not None:
-            new_seg["speaker"] = best_speaker
-        else:
-            new_seg["speaker"] = "UNKNOWN"
-
+        new_seg["speaker"] = speaker
         results.append(new_seg) #Retourne une nouvelle liste de segments texte avec une clé speaker
 
-
     return results
@@ -0,0 +1,117 @@
+"""
+Diarization result cache.
+
+Key: sha256 of the audio bytes + a fingerprint of the pipeline (model id,
+pyannote version, windowing parameters). Two tiers: an in-memory LRU and,
+when DIARIZATION_CACHE_DIR is set, compact `.npz` files (start/end float
+columns, speaker index column, label table) shared by all processes.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from importlib import metadata
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.lru_cache import LRUCache
+
+_memory = LRUCache(capacity=max(1, settings.DIARIZATION_CACHE_SIZE))
+_lock = threading.Lock()
+
+
+def pipeline_fingerprint() -> str:
+    """Tout ce qui change le résultat de la diarisation pour un même audio."""
+    try:
+        version = metadata.version("pyannote.audio")
+    except metadata.PackageNotFoundError:
+        version = "none"
+    return "|".join(
+        [
+            settings.DIARIZATION_MODEL_ID,
+            version,
+            str(settings.DIARIZATION_WINDOW_SEC),
+            str(settings.DIARIZATION_WINDOW_OVERLAP_SEC),
+        ]
+    )
+
+
+def cache_key(audio_bytes: bytes) -> str:
+    digest = hashlib.sha256(audio_bytes)
+    digest.update(pipeline_fingerprint().encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _disk_path(key: str) -> Optional[str]:
+    root = settings.DIARIZATION_CACHE_DIR
+    if not root:
+        return None
+    return os.path.join(root, key[:2], f"{key}.npz")
+
+
+def _to_arrays(turns: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    labels = sorted({str(t["speaker"]) for t in turns})
+    index = {label: i for i, label in enumerate(labels)}
+    return {
+        "start": np.array([t["start"] for t in turns], dtype=np.float64),
+        "end": np.array([t["end"] for t in turns], dtype=np.float64),
+        "speaker": np.array([index[str(t["speaker"])] for t in turns], dtype=np.int32),
+        "labels": np.array(labels, dtype=np.str_),
+    }
+
+
+def _from_arrays(arrays: Any) -> List[Dict[str, Any]]:
+    labels = [str(label) for label in arrays["labels"]]
+    return [
+        {"start": float(s), "end": float(e), "speaker": labels[k]}
+        for s, e, k in zip(arrays["start"], arrays["end"], arrays["speaker"])
+    ]
+
+
+def get(key: str) -> Optional[List[Dict[str, Any]]]:
+    """Tours de parole en cache (copie), ou None."""
+    with _lock:
+        cached = _memory.get(key)
+    if cached is not None:
+        return [dict(t) for t in cached["turns"]]
+
+    path = _disk_path(key)
+    if path is None or not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            turns = _from_arrays(arrays)
+    except (OSError, ValueError, KeyError):
+        return None
+    with _lock:
+        _memory.put(key, {"turns": turns})
+    return [dict(t) for t in turns]
+
+
+def put(key: str, turns: List[Dict[str, Any]]) -> None:
+    with _lock:
+        _memory.put(key, {"turns": [dict(t) for t in turns]})
+
+    path = _disk_path(key)
+    if path is None:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        arrays = _to_arrays(turns)
+        np.savez_compressed(
+            f,
+            start=arrays["start"],
+            end=arrays["end"],
+            speaker=arrays["speaker"],
+            labels=arrays["labels"],
+        )
+    os.replace(tmp, path)
+
+
+def clear_memory() -> None:
+    with _lock:
+        _memory.clear()
@@ -0,0 +1,91 @@
+"""
+Resident diarization worker.
+
+A small process pool whose initializer loads the pyannote pipeline once, so
+requests never pay the model cold start. Workers receive an already-decoded
+int16 16 kHz waveform; nothing is written to disk.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Pipeline propre à chaque processus worker
+_worker_pipeline: Any = None
+
+
+def _init_worker() -> None:
+    global _worker_pipeline
+    from app.services.diarization import load_diarization_pipeline
+
+    _worker_pipeline = load_diarization_pipeline()
+
+
+def _ping() -> bool:
+    return _worker_pipeline is not None
+
+
+def _diarize(samples: np.ndarray, sample_rate: int) -> List[Dict[str, Any]]:
+    from app.services.diarization import run_pipeline
+
+    return run_pipeline(_worker_pipeline, samples, sample_rate)
+
+
+def _diarize_window(
+    samples: np.ndarray, sample_rate: int
+) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]:
+    from app.services.diarization import run_pipeline_with_embeddings
+
+    return run_pipeline_with_embeddings(_worker_pipeline, samples, sample_rate)
+
+
+def start() -> None:
+    """Démarre les workers et attend que chacun ait chargé le pipeline."""
+    global _executor
+    if _executor is not None:
+        return
+    workers = max(1, settings.DIARIZATION_WORKERS)
+    # spawn : pas de fork d'un processus qui a déjà des threads (uvicorn, torch)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    for fut in [executor.submit(_ping) for _ in range(workers)]:
+        if not fut.result():
+            executor.shutdown(cancel_futures=True)
+            raise RuntimeError("Diarization worker failed to load the pipeline.")
+    _executor = executor
+
+
+def stop() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+def is_running() -> bool:
+    return _executor is not None
+
+
+def diarize(samples: np.ndarray, sample_rate: int) -> List[Dict[str, Any]]:
+    if _executor is None:
+        raise RuntimeError("Diarization worker is not running.")
+    return _executor.submit(_diarize, samples, sample_rate).result()
+
+
+def diarize_windows(
+    windows: Sequence[np.ndarray], sample_rate: int
+) -> List[Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]]:
+    """Une fenêtre par tâche : les workers du pool les traitent en parallèle."""
+    if _executor is None:
+        raise RuntimeError("Diarization worker is not running.")
+    futures = [_executor.submit(_diarize_window, w, sample_rate) for w in windows]
+    return [fut.result() for fut in futures]
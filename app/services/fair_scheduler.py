@@ -0,0 +1,129 @@
+"""
+Fair scheduling of ASR calls across principals.
+
+One process-wide pool of ASR_WORKERS threads serves every transcription.
+Each principal (API token, user, or "anonymous") has its own FIFO queue and
+the queues are served with deficit round robin: a job costs its audio
+seconds, a principal earns ASR_SCHEDULER_QUANTUM_SEC of credit each time
+its turn comes round, and runs its head job once the credit covers it. A
+5-hour upload therefore advances one chunk per round while a short clip
+from someone else waits at most for the jobs already in flight.
+
+The principal is taken from a ContextVar set by the endpoint, which
+asyncio.to_thread carries into the transcription thread.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+ANONYMOUS = "anonymous"
+
+_principal: ContextVar[str] = ContextVar("asr_principal", default=ANONYMOUS)
+
+
+def set_principal(key: str) -> None:
+    _principal.set(key)
+
+
+def current_principal() -> str:
+    return _principal.get()
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], Any]
+    cost: float
+    future: Future = field(default_factory=Future)
+
+
+class FairScheduler:
+    def __init__(self, workers: int, quantum: float):
+        self._workers = max(1, workers)
+        self._quantum = max(quantum, 1e-3)
+        self._queues: Dict[str, Deque[_Job]] = {}
+        self._deficit: Dict[str, float] = {}
+        # Principaux ayant du travail, dans l'ordre du tourniquet
+        self._active: Deque[str] = deque()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._busy = 0
+
+    def submit(
+        self, fn: Callable[[], Any], cost: float, principal: Optional[str] = None
+    ) -> Future:
+        """Met `fn` en file pour le principal (par défaut : celui du contexte)."""
+        key = principal or current_principal()
+        job = _Job(fn, max(float(cost), 0.0))
+        with self._cond:
+            self._ensure_started()
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+                # Un principal en tête d'un tourniquet vide commence avec un quantum
+                self._deficit[key] = 0.0 if self._active else self._quantum
+                self._active.append(key)
+            queue.append(job)
+            self._cond.notify()
+        return job.future
+
+    def _ensure_started(self) -> None:
+        while len(self._threads) < self._workers:
+            thread = threading.Thread(
+                target=self._work, name=f"asr-{len(self._threads)}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _take(self) -> _Job:
+        """Prochain job selon le DRR (appelé sous le verrou)."""
+        while not self._active:
+            self._cond.wait()
+        while True:
+            key = self._active[0]
+            queue = self._queues[key]
+            if queue[0].cost <= self._deficit[key]:
+                job = queue.popleft()
+                self._deficit[key] -= job.cost
+                if not queue:
+                    # File vide : le crédit restant n'est pas conservé
+                    self._active.popleft()
+                    del self._queues[key]
+                    del self._deficit[key]
+                    if self._active:
+                        self._deficit[self._active[0]] += self._quantum
+                return job
+            self._active.rotate(-1)
+            self._deficit[self._active[0]] += self._quantum
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job = self._take()
+                self._busy += 1
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.fn())
+                    except BaseException as e:
+                        job.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": self._workers,
+                "busy": self._busy,
+                "principals": len(self._active),
+                "queued": sum(len(q) for q in self._queues.values()),
+            }
+
+
+scheduler = FairScheduler(settings.ASR_WORKERS, settings.ASR_SCHEDULER_QUANTUM_SEC)
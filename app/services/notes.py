@@ -1,3 +1,5 @@
+import io
+import json
 import os
 import uuid
 from datetime import datetime
@@ -8,6 +10,9 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 
 from app.models.notes import MeetingSummary, Topic, ActionItem
+from app.services import usage
+from app.services.report_files import compress_variants
+from app.services.storage import get_storage
 
 from openai import OpenAI
 
@@ -52,9 +57,12 @@ TRANSCRIPT:
 {transcript_text}
 """
 
+NOTES_MODEL = "gpt-4o-mini"
+
+
 def generate_structured_notes(transcript_text: str, language: str = "auto") -> MeetingSummary:
     completion = client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=NOTES_MODEL,
         messages=[
             {"role": "system", "content": _SYSTEM_PROMPT},
             {"role": "user", "content": _build_user_prompt(transcript_text, language)},
@@ -62,6 +70,7 @@ def generate_structured_notes(transcript_text: str, language: str = "auto") -> M
         temperature=0.2,
         response_format={"type": "json_object"},
     )
+    usage.note_llm(NOTES_MODEL, getattr(completion, "usage", None))
     data = completion.choices[0].message.content
 
     import json
@@ -149,12 +158,38 @@ def render_markdown(summary: MeetingSummary, transcript_text: str) -> str:
     return "\n".join(lines)
 
 
+def _save_text_export(data: bytes, path: str) -> str:
+    """
+    Stocke un export texte (et ses variantes .gz/.br) dans le stockage dédupliqué.
+    `path` est `<DATA_ROOT>/<report_id>/<nom>`.
+    """
+    storage = get_storage(os.path.dirname(os.path.dirname(os.path.abspath(path))))
+    storage.write_artifact(path, data)
+    for suffix, payload in compress_variants(data).items():
+        storage.write_artifact(path + suffix, payload)
+    return path
+
+
 def save_markdown(md_text: str, out_dir: str) -> str:
-    _ensure_dir(out_dir)
     md_path = os.path.join(out_dir, "meeting-notes.md")
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(md_text)
-    return md_path
+    return _save_text_export(md_text.encode("utf-8"), md_path)
+
+
+def save_transcript_json(transcript: Dict[str, Any], out_dir: str) -> str:
+    """Transcription (langue, texte, segments) à côté des exports."""
+    json_path = os.path.join(out_dir, "transcript.json")
+    data = json.dumps(transcript, ensure_ascii=False).encode("utf-8")
+    return _save_text_export(data, json_path)
+
+
+def load_transcript_json(out_dir: str) -> Optional[Dict[str, Any]]:
+    """Transcription enregistrée par save_transcript_json (None si absente)."""
+    try:
+        with open(os.path.join(out_dir, "transcript.json"), "rb") as f:
+            transcript: Dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        return None
+    return transcript
 
 def save_pdf_simple(md_text: str, out_dir: str) -> str:
     """
@@ -194,8 +229,11 @@ def make_report_id() -> str:
 def generate_pdf_report(summary: MeetingSummary, transcript: str, pdf_path: str) -> str:
     """
     PDF structuré selon le template 
+    Construit en mémoire (invariant=1 : même contenu => mêmes octets, donc
+    dédupliqué) puis écrit via le stockage des rapports.
     """
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4)
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4, invariant=1)
     styles = getSampleStyleSheet()
     elements = []
 
@@ -286,4 +324,6 @@ def generate_pdf_report(summary: MeetingSummary, transcript: str, pdf_path: str)
     elements.append(Paragraph(transcript[:20000], body_style))
 
     doc.build(elements)
+    storage = get_storage(os.path.dirname(os.path.dirname(os.path.abspath(pdf_path))))
+    storage.write_artifact(pdf_path, buf.getvalue())
     return pdf_path
@@ -0,0 +1,107 @@
+"""
+Authenticated-principal cache.
+
+Maps a bearer token (sha256 of the JWT, whose signature covers the claims)
+to a detached snapshot of its `User`, for at most AUTH_CACHE_TTL_SECONDS and
+never beyond the token's `exp`. A hit skips both the JWT decode and the
+`users` query; the snapshot is merged into the request session without SQL.
+Entries of a user are dropped whenever that row is updated or deleted.
+
+API tokens use the same cache, keyed by their stored HMAC; deleting an
+`api_tokens` row (revocation) drops its entry in this process, other
+processes see it once the TTL expires.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, cast
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import APIToken, User
+from app.utils.ttl_cache import TTLCache
+
+_principals = TTLCache(
+    capacity=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _snapshot(user: User) -> User:
+    """Copie détachée (colonnes seulement), indépendante de la session d'origine."""
+    copy = User(
+        id=user.id, username=user.username, hashed_password=user.hashed_password
+    )
+    make_transient_to_detached(copy)
+    return copy
+
+
+async def get_cached_user(db: AsyncSession, key: str) -> Optional[User]:
+    snapshot = _principals.get(key)
+    if snapshot is None:
+        return None
+    return await db.merge(snapshot, load=False)
+
+
+def cache_user(key: str, user: User, exp: Optional[int]) -> None:
+    ttl = float(settings.AUTH_CACHE_TTL_SECONDS)
+    if exp:
+        # Même horloge que la vérification d'expiration de get_current_user
+        ttl = min(ttl, (datetime.fromtimestamp(exp) - datetime.now()).total_seconds())
+    _principals.put(key, _snapshot(user), ttl)
+
+
+def _api_key(token_hash: str) -> str:
+    return f"api:{token_hash}"
+
+
+async def get_cached_token_user(
+    db: AsyncSession, token_hash: str
+) -> Optional[Tuple[User, int]]:
+    """(utilisateur, id du jeton) d'un jeton API en cache."""
+    entry = _principals.get(_api_key(token_hash))
+    if entry is None:
+        return None
+    snapshot, token_id = entry
+    return await db.merge(snapshot, load=False), token_id
+
+
+def cache_token_user(token_hash: str, user: User, token_id: int) -> None:
+    _principals.put(_api_key(token_hash), (_snapshot(user), token_id))
+
+
+def invalidate_token(token_hash: str) -> None:
+    _principals.pop(_api_key(token_hash), None)
+
+
+def _user_of(entry: Any) -> User:
+    return cast(User, entry[0] if isinstance(entry, tuple) else entry)
+
+
+def invalidate_user(user_id: Any) -> int:
+    return _principals.discard_where(lambda entry: _user_of(entry).id == user_id)
+
+
+def clear() -> None:
+    _principals.clear()
+
+
+def stats() -> Dict[str, int]:
+    return _principals.stats()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper: Any, connection: Any, target: User) -> None:
+    invalidate_user(target.id)
+
+
+@event.listens_for(APIToken, "after_delete")
+def _invalidate_on_revoke(mapper: Any, connection: Any, target: APIToken) -> None:
+    invalidate_token(cast(str, target.token_hash))
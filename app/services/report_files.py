@@ -0,0 +1,215 @@
+"""
+Report file serving: precompressed variants, strong ETags and conditional requests.
+"""
+
+import gzip
+import hashlib
+import os
+import time
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from app.utils.lru_cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel, on se contente alors de gzip
+    brotli = None
+
+MEDIA_TYPES: Dict[str, str] = {
+    ".pdf": "application/pdf",
+    ".md": "text/markdown; charset=utf-8",
+    ".json": "application/json",
+    ".txt": "text/plain; charset=utf-8",
+    ".srt": "application/x-subrip",
+    ".vtt": "text/vtt; charset=utf-8",
+}
+
+# Exports texte pour lesquels on écrit des variantes .br / .gz
+COMPRESSIBLE_SUFFIXES = (".md", ".json", ".txt", ".srt", ".vtt")
+
+# Ordre de préférence pour la négociation (le plus compact d'abord)
+ENCODING_SUFFIXES: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+
+_CHUNK_SIZE = 64 * 1024
+
+_etag_cache = LRUCache(capacity=1024)
+
+
+def media_type_for(filename: str) -> str:
+    return MEDIA_TYPES.get(
+        os.path.splitext(filename)[1].lower(), "application/octet-stream"
+    )
+
+
+def is_compressible(filename: str) -> bool:
+    return filename.lower().endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def compress_variants(data: bytes) -> Dict[str, bytes]:
+    """
+    Calcule les variantes compressées d'un export texte, indexées par suffixe.
+    gzip est écrit avec mtime=0 pour que le contenu (et donc l'ETag) soit stable.
+    """
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return variants
+
+
+def file_etag(path: str) -> str:
+    """
+    ETag fort basé sur le contenu (sha256), mis en cache par (chemin, mtime, taille)
+    pour ne pas relire le fichier à chaque requête conditionnelle.
+    """
+    st = os.stat(path)
+    key = f"{path}:{st.st_mtime_ns}:{st.st_size}"
+    cached = _etag_cache.get(key)
+    if cached is not None:
+        return str(cached["etag"])
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()[:32]}"'
+    _etag_cache.put(key, {"etag": etag})
+    return etag
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def negotiate_variant(
+    path: str, accept_encoding: Optional[str]
+) -> Tuple[str, Optional[str]]:
+    """
+    Choisit la variante précompressée acceptée par le client, si elle existe.
+    Renvoie (chemin à servir, Content-Encoding ou None).
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding, suffix in ENCODING_SUFFIXES:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0 and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Comparaison faible (RFC 9110 §13.1.2) : W/"x" correspond à "x"
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def build_file_response(request: Request, path: str, filename: str) -> Response:
+    """
+    Sert un export avec négociation de contenu, ETag fort, If-None-Match et Range.
+    Les plages (Range / If-Range) sont gérées par FileResponse sur la variante servie.
+    """
+    headers = {"cache-control": "no-cache"}
+    served_path, encoding = path, None
+    if is_compressible(filename):
+        served_path, encoding = negotiate_variant(
+            path, request.headers.get("accept-encoding")
+        )
+        headers["vary"] = "Accept-Encoding"
+    if encoding:
+        headers["content-encoding"] = encoding
+
+    etag = file_etag(served_path)
+    headers["etag"] = etag
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        served_path,
+        media_type=media_type_for(filename),
+        filename=filename,
+        headers=headers,
+    )
+
+
+class _StreamSink:
+    """
+    Pseudo-fichier non seekable : zipfile écrit alors des data descriptors
+    et l'archive peut être émise au fil de l'eau, sans la matérialiser.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def bundle_members(report_dir: str) -> List[str]:
+    """Fichiers d'un rapport à mettre dans le ZIP (sans les variantes .gz/.br)."""
+    encoded = tuple(suffix for _, suffix in ENCODING_SUFFIXES)
+    return sorted(
+        entry.name
+        for entry in os.scandir(report_dir)
+        if entry.is_file()
+        and not entry.name.startswith(".")
+        and not entry.name.endswith(encoded)
+    )
+
+
+def iter_zip_bundle(report_dir: str) -> Iterator[bytes]:
+    """
+    Génère un ZIP de tous les artefacts du rapport, morceau par morceau.
+    Les exports texte sont deflatés, le reste (PDF...) stocké tel quel.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, "w") as zf:
+        for name in bundle_members(report_dir):
+            path = os.path.join(report_dir, name)
+            info = zipfile.ZipInfo(name, time.localtime(os.stat(path).st_mtime)[:6])
+            info.compress_type = (
+                zipfile.ZIP_DEFLATED if is_compressible(name) else zipfile.ZIP_STORED
+            )
+            with open(path, "rb") as src, zf.open(info, "w") as dest:
+                for chunk in iter(lambda: src.read(_CHUNK_SIZE), b""):
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # Répertoire central, écrit à la fermeture de l'archive
+    yield sink.drain()
@@ -0,0 +1,114 @@
+"""
+Report metadata service.
+"""
+
+import base64
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, cast
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.report import Report
+from app.services.search import delete_report_entries
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(report: Report) -> str:
+    """Curseur opaque de pagination keyset : (created_at, id) du dernier élément."""
+    raw = f"{report.created_at.isoformat()}|{report.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, report_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), report_id
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+async def record_report(
+    db: AsyncSession,
+    report_id: str,
+    owner_id: Optional[int],
+    language: Optional[str],
+    duration_sec: Optional[float],
+    markdown_path: Optional[str],
+    pdf_path: Optional[str],
+) -> Report:
+    """Enregistre les métadonnées d'un rapport produit sous DATA_ROOT."""
+    report = Report(
+        id=report_id,
+        owner_id=owner_id,
+        language=language,
+        duration_sec=duration_sec,
+        markdown_path=markdown_path,
+        pdf_path=pdf_path,
+    )
+    db.add(report)
+    await db.commit()
+    await db.refresh(report)
+    return report
+
+
+async def get_report(db: AsyncSession, report_id: str) -> Optional[Report]:
+    return await db.get(Report, report_id)
+
+
+async def attach_exports(
+    db: AsyncSession,
+    report_id: str,
+    language: Optional[str],
+    markdown_path: Optional[str],
+    pdf_path: Optional[str],
+) -> None:
+    """Complète un rapport issu de /transcribe avec les exports de /notes."""
+    values = {"markdown_path": markdown_path, "pdf_path": pdf_path}
+    if language:
+        values["language"] = language
+    await db.execute(update(Report).where(Report.id == report_id).values(**values))
+    await db.commit()
+
+
+async def list_reports_for_user(
+    db: AsyncSession,
+    owner_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Report], Optional[str]]:
+    """
+    Liste les rapports d'un utilisateur du plus récent au plus ancien.
+    Pagination keyset sur (created_at, id), servie par ix_reports_owner_created :
+    le coût d'une page ne dépend pas de sa position.
+    """
+    query = select(Report).filter(Report.owner_id == owner_id)
+    if cursor:
+        created_at, report_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                Report.created_at < created_at,
+                and_(Report.created_at == created_at, Report.id < report_id),
+            )
+        )
+    query = query.order_by(Report.created_at.desc(), Report.id.desc()).limit(limit + 1)
+
+    result = await db.execute(query)
+    rows = cast(Sequence[Report], result.scalars().all())
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+    return items, next_cursor
+
+
+async def delete_reports(db: AsyncSession, report_ids: Sequence[str]) -> None:
+    """Supprime les métadonnées de rapports évincés du stockage."""
+    if not report_ids:
+        return
+    await delete_report_entries(db, report_ids)
+    await db.execute(delete(Report).where(Report.id.in_(report_ids)))
+    await db.commit()
@@ -0,0 +1,152 @@
+"""
+Full-text search over transcripts and meeting summaries.
+
+SQLite uses the FTS5 table `report_search_fts` (bm25 ranking), PostgreSQL a
+`to_tsvector('simple', ...)` GIN index (ts_rank). Other engines fall back to
+a plain LIKE scan.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.notes import MeetingSummary
+from app.models.report import ReportSearchEntry
+
+_TIMESTAMP_RE = re.compile(r"^\s*(?:(\d+):)?(\d{1,2}):(\d{2})(?:[.,](\d+))?\s*$")
+
+
+def parse_timestamp_ms(value: Optional[str]) -> Optional[int]:
+    """ "HH:MM:SS", "MM:SS" ou "HH:MM:SS.mmm" -> millisecondes (None si illisible)."""
+    if not value:
+        return None
+    m = _TIMESTAMP_RE.match(value)
+    if not m:
+        return None
+    hours, minutes, seconds, frac = m.groups()
+    ms = ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000
+    if frac:
+        ms += int(frac[:3].ljust(3, "0"))
+    return ms
+
+
+def _summary_entries(summary: MeetingSummary) -> Iterable[Dict[str, Any]]:
+    if summary.executive_summary:
+        yield {"kind": "summary", "text": summary.executive_summary}
+    for objective in summary.objectives:
+        yield {"kind": "objective", "text": objective}
+    for topic in summary.topics:
+        yield {
+            "kind": "topic",
+            "text": " - ".join(p for p in (topic.title, topic.description) if p),
+            "start_ms": parse_timestamp_ms(topic.start),
+            "end_ms": parse_timestamp_ms(topic.end),
+        }
+    for decision in summary.decisions:
+        yield {"kind": "decision", "text": decision}
+    for action in summary.actions:
+        parts = [action.owner, action.action, action.due]
+        yield {"kind": "action", "text": " - ".join(p for p in parts if p)}
+    for outcome in summary.outcomes:
+        yield {"kind": "outcome", "text": outcome}
+    for step in summary.next_steps:
+        yield {"kind": "next_step", "text": step}
+
+
+async def index_report(
+    db: AsyncSession,
+    report_id: str,
+    owner_id: Optional[int],
+    segments: Sequence[Dict[str, Any]],
+    summary: Optional[MeetingSummary],
+) -> int:
+    """
+    Indexe les segments (texte, speaker, temps) et le résumé d'un rapport.
+    Insertion groupée ; l'index FTS est alimenté par les triggers.
+    """
+    rows: List[Dict[str, Any]] = []
+    for seg in segments:
+        seg_text = (seg.get("text") or "").strip()
+        if not seg_text:
+            continue
+        rows.append(
+            {
+                "kind": "segment",
+                "text": seg_text,
+                "speaker": seg.get("speaker"),
+                "start_ms": int(round(float(seg.get("start", 0.0)) * 1000)),
+                "end_ms": int(round(float(seg.get("end", 0.0)) * 1000)),
+            }
+        )
+    if summary is not None:
+        rows.extend(entry for entry in _summary_entries(summary) if entry["text"])
+
+    if not rows:
+        return 0
+    for row in rows:
+        row["report_id"] = report_id
+        row["owner_id"] = owner_id
+        row.setdefault("speaker", None)
+        row.setdefault("start_ms", None)
+        row.setdefault("end_ms", None)
+    await db.execute(insert(ReportSearchEntry), rows)
+    await db.commit()
+    return len(rows)
+
+
+async def delete_report_entries(db: AsyncSession, report_ids: Sequence[str]) -> None:
+    await db.execute(
+        delete(ReportSearchEntry).where(ReportSearchEntry.report_id.in_(report_ids))
+    )
+
+
+def _fts5_query(query: str) -> str:
+    # Chaque mot est une chaîne FTS5 littérale (pas d'opérateurs côté client)
+    terms = [t.replace('"', '""') for t in query.split() if t.strip()]
+    return " ".join(f'"{t}"' for t in terms)
+
+
+async def search_reports(
+    db: AsyncSession, owner_id: int, query: str, limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Résultats classés (meilleur d'abord) avec offsets en millisecondes."""
+    if not query.strip():
+        return []
+    dialect = db.bind.dialect.name if db.bind is not None else ""
+
+    if dialect == "sqlite":
+        sql = text(
+            "SELECT e.report_id, e.kind, e.speaker, e.start_ms, e.end_ms, "
+            "snippet(report_search_fts, 0, '[', ']', '…', 16) AS snippet, "
+            "-bm25(report_search_fts) AS score "
+            "FROM report_search_fts "
+            "JOIN report_search_entries e ON e.id = report_search_fts.rowid "
+            "WHERE report_search_fts MATCH :q AND e.owner_id = :owner_id "
+            "ORDER BY bm25(report_search_fts) LIMIT :limit"
+        )
+        params: Dict[str, Any] = {"q": _fts5_query(query)}
+    elif dialect == "postgresql":
+        sql = text(
+            "SELECT report_id, kind, speaker, start_ms, end_ms, "
+            "ts_headline('simple', text, plainto_tsquery('simple', :q)) AS snippet, "
+            "ts_rank(to_tsvector('simple', text), plainto_tsquery('simple', :q)) AS score "
+            "FROM report_search_entries "
+            "WHERE to_tsvector('simple', text) @@ plainto_tsquery('simple', :q) "
+            "AND owner_id = :owner_id "
+            "ORDER BY score DESC LIMIT :limit"
+        )
+        params = {"q": query}
+    else:
+        sql = text(
+            "SELECT report_id, kind, speaker, start_ms, end_ms, text AS snippet, "
+            "1.0 AS score FROM report_search_entries "
+            "WHERE lower(text) LIKE :q AND owner_id = :owner_id "
+            "ORDER BY report_id DESC, start_ms LIMIT :limit"
+        )
+        params = {"q": f"%{query.lower()}%"}
+
+    params.update({"owner_id": owner_id, "limit": limit})
+    result = await db.execute(sql, params)
+    return [dict(row._mapping) for row in result]
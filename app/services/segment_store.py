@@ -0,0 +1,224 @@
+"""
+Columnar transcript segments.
+
+Segments travel through the ASR, chunk merging and speaker assignment stages
+as NumPy columns (start, end, speaker id) plus a single text buffer indexed by
+offsets, instead of one dict per segment. Shifting, sorting and slicing are
+vectorized; dicts / Pydantic models are only built at the API edge.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.schemas.reports import TranscriptSegment
+
+NO_SPEAKER = -1
+
+
+class SegmentStore:
+    __slots__ = (
+        "start",
+        "end",
+        "speaker_ids",
+        "speakers",
+        "_text",
+        "_offsets",
+        "source",
+    )
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        text: str,
+        offsets: np.ndarray,
+        speaker_ids: Optional[np.ndarray] = None,
+        speakers: Optional[List[str]] = None,
+        source: Optional[np.ndarray] = None,
+    ):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self._text = text
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self.speaker_ids = (
+            np.full(len(self.start), NO_SPEAKER, dtype=np.int32)
+            if speaker_ids is None
+            else np.asarray(speaker_ids, dtype=np.int32)
+        )
+        self.speakers = speakers or []
+        # Tours fusionnés : [début, fin) des segments d'origine, shape (n, 2)
+        self.source = None if source is None else np.asarray(source, dtype=np.int64)
+
+    # Construction
+
+    @classmethod
+    def from_columns(
+        cls,
+        start: Sequence[float],
+        end: Sequence[float],
+        texts: Sequence[str],
+        speakers: Optional[Sequence[Optional[str]]] = None,
+    ) -> "SegmentStore":
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+        store = cls(np.array(start), np.array(end), "".join(texts), offsets)
+        if speakers is not None:
+            store = store.with_speakers(speakers)
+        return store
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Mapping[str, Any]]) -> "SegmentStore":
+        segments = list(segments)
+        start = [float(s.get("start", 0.0) or 0.0) for s in segments]
+        return cls.from_columns(
+            start,
+            [float(s.get("end", st) or 0.0) for s, st in zip(segments, start)],
+            [s.get("text") or "" for s in segments],
+            [s.get("speaker") for s in segments],
+        )
+
+    @classmethod
+    def empty(cls) -> "SegmentStore":
+        return cls.from_columns([], [], [])
+
+    @classmethod
+    def concat(cls, stores: Sequence["SegmentStore"]) -> "SegmentStore":
+        """Concaténation ; les tables de speakers sont fusionnées par label."""
+        if not stores:
+            return cls.empty()
+        index: Dict[str, int] = {}
+        ids, offsets = [], [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for s in stores:
+            remap = np.array(
+                [index.setdefault(name, len(index)) for name in s.speakers]
+                + [NO_SPEAKER],
+                dtype=np.int32,
+            )
+            ids.append(remap[s.speaker_ids])  # NO_SPEAKER (-1) -> dernier élément
+            offsets.append(s._offsets[1:] + base)
+            base += len(s._text)
+        return cls(
+            np.concatenate([s.start for s in stores]),
+            np.concatenate([s.end for s in stores]),
+            "".join(s._text for s in stores),
+            np.concatenate(offsets),
+            np.concatenate(ids),
+            list(index),
+        )
+
+    # Accès
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def text_at(self, i: int) -> str:
+        return self._text[self._offsets[i] : self._offsets[i + 1]]
+
+    def texts(self) -> List[str]:
+        bounds = self._offsets.tolist()
+        return [self._text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+    def text_buffer(self) -> Tuple[str, np.ndarray]:
+        """Tampon texte et offsets (caractères) des segments, pour la sérialisation."""
+        return self._text, self._offsets
+
+    def speaker_labels(self) -> List[Optional[str]]:
+        names = self.speakers
+        return [names[k] if k >= 0 else None for k in self.speaker_ids.tolist()]
+
+    @property
+    def duration(self) -> Optional[float]:
+        return float(self.end.max()) if len(self) else None
+
+    def nbytes(self) -> int:
+        """Empreinte approximative (colonnes + tampon texte)."""
+        columns = self.start.nbytes + self.end.nbytes + self.speaker_ids.nbytes
+        return columns + self._offsets.nbytes + len(self._text.encode("utf-8"))
+
+    # Transformations vectorisées (renvoient un nouveau store)
+
+    def shift(self, offset: float) -> "SegmentStore":
+        return SegmentStore(
+            self.start + offset,
+            self.end + offset,
+            self._text,
+            self._offsets,
+            self.speaker_ids,
+            self.speakers,
+            self.source,
+        )
+
+    def take(self, indices: np.ndarray) -> "SegmentStore":
+        indices = np.asarray(indices, dtype=np.int64)
+        bounds = self._offsets
+        texts = [self._text[bounds[i] : bounds[i + 1]] for i in indices.tolist()]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(bounds[indices + 1] - bounds[indices], out=offsets[1:])
+        return SegmentStore(
+            self.start[indices],
+            self.end[indices],
+            "".join(texts),
+            offsets,
+            self.speaker_ids[indices],
+            self.speakers,
+            None if self.source is None else self.source[indices],
+        )
+
+    def sorted(self) -> "SegmentStore":
+        """Tri stable par début de segment."""
+        order = np.argsort(self.start, kind="stable")
+        if np.array_equal(order, np.arange(len(order))):
+            return self
+        return self.take(order)
+
+    def slice_time(self, t0: float, t1: float) -> "SegmentStore":
+        """Segments qui chevauchent [t0, t1) (store trié par début)."""
+        hi = int(np.searchsorted(self.start, t1, side="left"))
+        keep = np.flatnonzero(self.end[:hi] > t0)
+        return self.take(keep)
+
+    def with_speakers(self, labels: Sequence[Optional[str]]) -> "SegmentStore":
+        """Remplace la colonne speaker à partir d'un label par segment."""
+        index: Dict[str, int] = {}
+        ids = np.array(
+            [
+                NO_SPEAKER if lab is None else index.setdefault(lab, len(index))
+                for lab in labels
+            ],
+            dtype=np.int32,
+        )
+        return SegmentStore(
+            self.start,
+            self.end,
+            self._text,
+            self._offsets,
+            ids,
+            list(index),
+            self.source,
+        )
+
+    # Sorties (bord de l'API)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        sources = None if self.source is None else self.source.tolist()
+        for i, (s, e, text, speaker) in enumerate(
+            zip(
+                self.start.tolist(),
+                self.end.tolist(),
+                self.texts(),
+                self.speaker_labels(),
+            )
+        ):
+            seg: Dict[str, Any] = {"start": s, "end": e, "text": text}
+            if speaker is not None:
+                seg["speaker"] = speaker
+            if sources is not None:
+                seg["source_range"] = sources[i]
+            out.append(seg)
+        return out
+
+    def to_schema(self) -> List[TranscriptSegment]:
+        return [TranscriptSegment(**seg) for seg in self.to_dicts()]
@@ -0,0 +1,303 @@
+"""
+Lightweight speaker clustering (diarization=cluster).
+
+Each ASR segment gets a cheap spectral embedding (MFCC mean/std computed with
+NumPy), embeddings are clustered agglomeratively (average linkage, euclidean
+distance on mean-centred embeddings) and the number of speakers is chosen by
+silhouette score. No model download, no GPU: a small fraction of real time
+on CPU.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, cast
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+_FRAME = 400  # 25 ms
+_HOP = 160  # 10 ms
+_N_FFT = 512
+_N_MELS = 40
+_N_MFCC = 20
+
+# Segments plus courts : pas assez de trames, speaker du voisin le plus proche
+MIN_SEGMENT_SEC = 0.4
+# Au-delà, pré-regroupement k-means avant l'agglomératif (coût O(k^3))
+MAX_LEAVES = 96
+# Pour retenir k >= 2 : silhouette minimale, et enveloppes spectrales moyennes
+# des centroïdes distantes d'au moins MIN_ENVELOPE_DB (écart RMS log-mel), pour
+# ne pas découper une seule voix (voix de test : moins de 0,5 dB pour une même
+# voix, plus de 10 dB entre deux voix).
+MIN_SILHOUETTE = 0.5
+MIN_ENVELOPE_DB = 2.0
+# Même seuil en distance cepstrale : les lignes k >= 1 de la DCT ont une norme²
+# de _N_MELS / 2, d'où ‖Δmfcc‖ ≈ _N_MELS / √2 × RMS(Δ log-mel) pour une
+# différence d'enveloppe lisse, en népers (1 Np = 10·log10(e) ≈ 4,34 dB). La
+# moitié écart-type de l'embedding ne fait qu'allonger la distance. ≈ 13.
+MIN_CENTROID_DISTANCE = (
+    _N_MELS / np.sqrt(2.0) * MIN_ENVELOPE_DB / (10.0 * np.log10(np.e))
+)
+
+
+def _mel_filterbank() -> np.ndarray:
+    def hz_to_mel(f: np.ndarray) -> np.ndarray:
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def mel_to_hz(m: np.ndarray) -> np.ndarray:
+        return 700.0 * (10 ** (m / 2595.0) - 1.0)
+
+    mels = np.linspace(
+        hz_to_mel(np.array(60.0)), hz_to_mel(np.array(7600.0)), _N_MELS + 2
+    )
+    bins = np.floor((_N_FFT + 1) * mel_to_hz(mels) / SAMPLE_RATE).astype(int)
+    fb = np.zeros((_N_MELS, _N_FFT // 2 + 1), dtype=np.float32)
+    for m in range(1, _N_MELS + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            fb[m - 1, k] = (k - left) / max(1, center - left)
+        for k in range(center, right):
+            fb[m - 1, k] = (right - k) / max(1, right - center)
+    return fb
+
+
+def _dct_matrix() -> np.ndarray:
+    n = np.arange(_N_MELS)
+    k = np.arange(_N_MFCC)[:, None]
+    dct: np.ndarray = np.cos(np.pi / _N_MELS * (n + 0.5) * k).astype(np.float32)
+    return dct
+
+
+_MEL_FB = _mel_filterbank()
+_DCT = _dct_matrix()
+_WINDOW = np.hanning(_FRAME).astype(np.float32)
+
+
+def segment_embedding(samples: np.ndarray) -> Optional[np.ndarray]:
+    """MFCC (sans c0) moyenne + écart-type sur les trames voisées d'un segment."""
+    if len(samples) < _FRAME:
+        return None
+    x = samples.astype(np.float32) / 32768.0
+    frames = np.lib.stride_tricks.sliding_window_view(x, _FRAME)[::_HOP] * _WINDOW
+    power = np.abs(np.fft.rfft(frames, n=_N_FFT)) ** 2
+    log_mel = np.log(power @ _MEL_FB.T + 1e-10)
+
+    # On ignore les trames de silence (énergie < 30e percentile)
+    energy = log_mel.mean(axis=1)
+    voiced = log_mel[energy >= np.percentile(energy, 30)]
+    if len(voiced) < 3:
+        return None
+    mfcc = voiced @ _DCT.T
+    mfcc = mfcc[:, 1:]
+    return np.concatenate([mfcc.mean(axis=0), mfcc.std(axis=0)])
+
+
+def _pairwise_distances(x: np.ndarray) -> np.ndarray:
+    sq = (x**2).sum(axis=1)
+    dist: np.ndarray = np.sqrt(
+        np.maximum(sq[:, None] + sq[None, :] - 2.0 * x @ x.T, 0.0)
+    )
+    return dist
+
+
+def _sq_distances(x: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """‖x − c‖² par ‖x‖² − 2x·c + ‖c‖² : matrice n × k, sans temporaire n × k × d."""
+    sq = (x**2).sum(axis=1)[:, None] + (c**2).sum(axis=1)[None, :]
+    dist: np.ndarray = np.maximum(sq - 2.0 * x @ c.T, 0.0)
+    return dist
+
+
+def _kmeans(x: np.ndarray, weights: np.ndarray, k: int, iters: int = 20) -> np.ndarray:
+    """k-means déterministe (init k-means++ à graine fixe). Renvoie les labels."""
+    rng = np.random.default_rng(0)
+    centers = [x[rng.integers(len(x))]]
+    d2 = ((x - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        idx = rng.choice(len(x), p=d2 / d2.sum()) if d2.sum() > 0 else 0
+        centers.append(x[idx])
+        d2 = np.minimum(d2, ((x - x[idx]) ** 2).sum(axis=1))
+    c = np.array(centers)
+    labels = np.zeros(len(x), dtype=int)
+    for _ in range(iters):
+        labels = np.argmin(_sq_distances(x, c), axis=1)
+        for j in range(k):
+            mask = labels == j
+            if mask.any():
+                c[j] = np.average(x[mask], axis=0, weights=weights[mask])
+    return labels
+
+
+def _average_linkage(
+    dist: np.ndarray, weights: np.ndarray, max_clusters: int
+) -> Dict[int, np.ndarray]:
+    """
+    Agglomératif (moyenne pondérée, mise à jour de Lance-Williams) jusqu'à un
+    seul cluster. Renvoie, pour k = 1..max_clusters, les labels des feuilles.
+    """
+    n = len(dist)
+    d = dist.astype(np.float64).copy()
+    np.fill_diagonal(d, np.inf)
+    w = weights.astype(np.float64).copy()
+    members = {i: [i] for i in range(n)}
+    partitions: Dict[int, np.ndarray] = {}
+
+    def snapshot() -> np.ndarray:
+        labels = np.empty(n, dtype=int)
+        for label, root in enumerate(sorted(members)):
+            labels[members[root]] = label
+        return labels
+
+    clusters = n
+    if clusters <= max_clusters:
+        partitions[clusters] = snapshot()
+    while clusters > 1:
+        i, j = sorted(int(v) for v in np.unravel_index(np.argmin(d), d.shape))
+        merged = (w[i] * d[i] + w[j] * d[j]) / (w[i] + w[j])
+        d[i], d[:, i] = merged, merged
+        d[i, i] = np.inf
+        d[j, :], d[:, j] = np.inf, np.inf
+        w[i] += w[j]
+        members[i].extend(members.pop(j))
+        clusters -= 1
+        if clusters <= max_clusters:
+            partitions[clusters] = snapshot()
+    return partitions
+
+
+def _silhouette(dist: np.ndarray, labels: np.ndarray, weights: np.ndarray) -> float:
+    k = labels.max() + 1
+    if k < 2:
+        return -1.0
+    per_cluster = np.stack(
+        [
+            (dist[:, labels == c] * weights[labels == c]).sum(axis=1)
+            / weights[labels == c].sum()
+            for c in range(k)
+        ],
+        axis=1,
+    )
+    own = per_cluster[np.arange(len(labels)), labels]
+    per_cluster[np.arange(len(labels)), labels] = np.inf
+    other = per_cluster.min(axis=1)
+    s = (other - own) / np.maximum(np.maximum(own, other), 1e-8)
+    return float(np.average(s, weights=weights))
+
+
+def cluster_embeddings(
+    embeddings: np.ndarray,
+    durations: np.ndarray,
+    max_speakers: int,
+    min_silhouette: float = MIN_SILHOUETTE,
+) -> np.ndarray:
+    """Labels de speaker (0..k-1), k choisi automatiquement (<= max_speakers)."""
+    n = len(embeddings)
+    if n < 2 or max_speakers < 2:
+        return np.zeros(n, dtype=int)
+    x = embeddings - embeddings.mean(axis=0, keepdims=True)
+    weights = np.maximum(durations, 1e-3)
+
+    # Pré-regroupement : l'agglomératif porte sur au plus MAX_LEAVES feuilles
+    if n > MAX_LEAVES:
+        leaf_of = _kmeans(x, weights, MAX_LEAVES)
+        leaves = np.unique(leaf_of)
+        leaf_of = np.searchsorted(leaves, leaf_of)
+        leaf_w = np.bincount(leaf_of, weights=weights)
+        leaf_x = np.stack(
+            [
+                np.average(x[leaf_of == j], axis=0, weights=weights[leaf_of == j])
+                for j in range(len(leaves))
+            ]
+        )
+    else:
+        leaf_of = np.arange(n)
+        leaf_x, leaf_w = x, weights
+
+    dist = _pairwise_distances(leaf_x)
+    partitions = _average_linkage(dist, leaf_w, min(max_speakers, len(leaf_x)))
+
+    best_k, best_score = 1, min_silhouette
+    for k, labels in partitions.items():
+        if k < 2:
+            continue
+        centroids = np.stack(
+            [
+                np.average(leaf_x[labels == c], axis=0, weights=leaf_w[labels == c])
+                for c in range(k)
+            ]
+        )
+        gaps = _pairwise_distances(centroids)
+        np.fill_diagonal(gaps, np.inf)
+        if gaps.min() < MIN_CENTROID_DISTANCE:
+            continue
+        score = _silhouette(dist, labels, leaf_w)
+        if score > best_score:
+            best_k, best_score = k, score
+    return partitions[best_k][leaf_of]
+
+
+def cluster_speaker_labels(
+    starts: Sequence[float],
+    ends: Sequence[float],
+    samples: np.ndarray,
+    max_speakers: int = 4,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[str]:
+    """
+    "Speaker N" pour chaque intervalle [starts[i], ends[i]] (numérotés par ordre
+    d'apparition). `samples` : PCM int16 mono de l'enregistrement complet.
+    """
+    n = len(starts)
+    if n == 0:
+        return []
+
+    embedded: List[Tuple[int, np.ndarray, float]] = []
+    for i, (start, end) in enumerate(zip(map(float, starts), map(float, ends))):
+        if end - start < MIN_SEGMENT_SEC:
+            continue
+        a, b = int(start * sample_rate), int(end * sample_rate)
+        emb = segment_embedding(samples[a:b])
+        if emb is not None:
+            embedded.append((i, emb, end - start))
+
+    labels: List[Optional[int]] = [None] * n
+    if embedded:
+        cluster = cluster_embeddings(
+            np.stack([e for _, e, _ in embedded]),
+            np.array([d for _, _, d in embedded]),
+            max_speakers,
+        )
+        for (i, _, _), c in zip(embedded, cluster):
+            labels[i] = int(c)
+
+    # Segments trop courts : speaker du segment embeddé le plus proche dans le
+    # temps (écart entre intervalles, 0 s'ils se chevauchent)
+    known = np.array([i for i, label in enumerate(labels) if label is not None])
+    s = np.asarray(starts, dtype=np.float64)
+    e = np.asarray(ends, dtype=np.float64)
+    for i in range(n):
+        if labels[i] is None:
+            if not len(known):
+                labels[i] = 0
+                continue
+            gap = np.maximum(0.0, np.maximum(s[known] - e[i], s[i] - e[known]))
+            labels[i] = labels[int(known[np.argmin(gap)])]
+
+    order: Dict[int, int] = {}
+    return [
+        f"Speaker {order.setdefault(cast(int, label), len(order) + 1)}"
+        for label in labels
+    ]
+
+
+def assign_speakers_by_clustering(
+    segments: List[Dict],
+    samples: np.ndarray,
+    max_speakers: int = 4,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Dict]:
+    """Variante sur une liste de segments dict (clé "speaker" ajoutée en place)."""
+    starts = [float(seg.get("start", 0.0)) for seg in segments]
+    ends = [float(seg.get("end", start)) for seg, start in zip(segments, starts)]
+    labels = cluster_speaker_labels(starts, ends, samples, max_speakers, sample_rate)
+    for seg, label in zip(segments, labels):
+        seg["speaker"] = label
+    return segments
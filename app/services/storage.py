@@ -0,0 +1,320 @@
+"""
+Content-addressed storage for report artifacts.
+
+Blobs live under `<DATA_ROOT>/.blobs/<aa>/<sha256>` and each report file
+(`<DATA_ROOT>/<report_id>/<name>`) is a hard link to its blob: identical
+artifacts share one inode, and the link count is the per-report refcount
+(`st_nlink - 1`). A blob whose only remaining link is the one under `.blobs`
+is garbage. The last access of a report is the mtime of its directory.
+
+Limits are enforced by a background sweep, off the request path. The sweep
+works from an in-memory index (last access and bytes of each report, bytes
+used under the root), built by one full scan on first use and then kept up
+to date by writes, touches and deletions.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+BLOB_DIR = ".blobs"
+
+
+@dataclass
+class ReportUsage:
+    report_id: str
+    last_access: float
+    # Octets libérés si le rapport est supprimé (blobs non partagés)
+    exclusive_bytes: int
+
+
+class ReportStorage:
+    def __init__(self, root: str, retention_days: int = 0, quota_bytes: int = 0):
+        self.root = os.path.abspath(root)
+        self.blob_root = os.path.join(self.root, BLOB_DIR)
+        self.retention_days = retention_days
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        # Index en mémoire (None tant que le premier balayage n'a pas eu lieu)
+        self._last_access: Optional[Dict[str, float]] = None
+        self._report_bytes: Dict[str, int] = {}
+        self._used = 0
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_root, digest[:2], digest)
+
+    def report_dir(self, report_id: str) -> str:
+        return os.path.join(self.root, report_id)
+
+    def _write_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, blob)
+            self._used += len(data)
+        return blob
+
+    def put_bytes(self, report_id: str, name: str, data: bytes) -> str:
+        """Stocke `data` sous `<report_id>/<name>` et renvoie le chemin du fichier."""
+        out_dir = self.report_dir(report_id)
+        os.makedirs(out_dir, exist_ok=True)
+        dest = os.path.join(out_dir, name)
+
+        with self._lock:
+            blob = self._write_blob(data)
+            previous = 0
+            if os.path.lexists(dest):
+                st = os.lstat(dest)
+                previous = st.st_size
+                if st.st_nlink == 1:
+                    self._used -= st.st_size
+                os.unlink(dest)
+            try:
+                os.link(blob, dest)
+            except FileNotFoundError:
+                # Le blob a été collecté entre l'écriture et le lien : on le réécrit
+                os.link(self._write_blob(data), dest)
+            except OSError:
+                # Volume sans hard links : copie simple, sans déduplication
+                shutil.copyfile(blob, dest)
+                self._used += len(data)
+            if self._last_access is not None:
+                self._last_access[report_id] = os.stat(out_dir).st_mtime
+                self._report_bytes[report_id] = (
+                    self._report_bytes.get(report_id, 0) - previous + len(data)
+                )
+        return dest
+
+    def write_artifact(self, path: str, data: bytes) -> str:
+        """Variante de put_bytes pour un chemin `<root>/<report_id>/<name>`."""
+        report_dir, name = os.path.split(os.path.abspath(path))
+        return self.put_bytes(os.path.basename(report_dir), name, data)
+
+    def touch(self, report_id: str) -> None:
+        """Marque le rapport comme accédé (LRU)."""
+        try:
+            os.utime(self.report_dir(report_id))
+        except FileNotFoundError:
+            return
+        if self._last_access is not None and report_id in self._last_access:
+            self._last_access[report_id] = time.time()
+
+    def refcount(self, digest: str) -> int:
+        try:
+            return os.stat(self.blob_path(digest)).st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def iter_report_ids(self) -> Iterable[str]:
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False) and not entry.name.startswith(
+                    "."
+                ):
+                    yield entry.name
+
+    def _report_usage(self, report_id: str) -> ReportUsage:
+        out_dir = self.report_dir(report_id)
+        exclusive = 0
+        with os.scandir(out_dir) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                # 2 liens = le blob + ce fichier ; 1 = copie hors blob store
+                if st.st_nlink <= 2:
+                    exclusive += st.st_size
+        return ReportUsage(report_id, os.stat(out_dir).st_mtime, exclusive)
+
+    def disk_usage(self) -> int:
+        """Octets occupés sous la racine, chaque inode compté une seule fois."""
+        seen: Set[Tuple[int, int]] = set()
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                st = os.lstat(os.path.join(dirpath, filename))
+                key = (st.st_dev, st.st_ino)
+                if key not in seen:
+                    seen.add(key)
+                    total += st.st_size
+        return total
+
+    def report_bytes(self, report_id: str) -> int:
+        """Taille cumulée des fichiers du rapport (index en mémoire)."""
+        return self._report_bytes.get(report_id, 0)
+
+    def used_bytes(self) -> Optional[int]:
+        """Octets occupés sous la racine, ou None avant le premier balayage."""
+        return None if self._last_access is None else self._used
+
+    def over_quota(self) -> bool:
+        used = self.used_bytes()
+        return bool(self.quota_bytes) and used is not None and used > self.quota_bytes
+
+    def _load_index(self) -> Dict[str, float]:
+        """Balayage complet, une seule fois par processus (hors requêtes)."""
+        with self._lock:
+            if self._last_access is None:
+                last_access: Dict[str, float] = {}
+                for rid in self.iter_report_ids():
+                    out_dir = self.report_dir(rid)
+                    with os.scandir(out_dir) as entries:
+                        self._report_bytes[rid] = sum(
+                            e.stat(follow_symlinks=False).st_size
+                            for e in entries
+                            if e.is_file(follow_symlinks=False)
+                        )
+                    last_access[rid] = os.stat(out_dir).st_mtime
+                self._used = self.disk_usage()
+                self._last_access = last_access
+            return self._last_access
+
+    def delete_report(self, report_id: str) -> None:
+        out_dir = self.report_dir(report_id)
+        with self._lock:
+            # Copies hors blob store (1 lien) : libérées tout de suite
+            with contextlib.suppress(FileNotFoundError), os.scandir(out_dir) as entries:
+                for entry in entries:
+                    st = entry.stat(follow_symlinks=False)
+                    if entry.is_file(follow_symlinks=False) and st.st_nlink == 1:
+                        self._used -= st.st_size
+            shutil.rmtree(out_dir, ignore_errors=True)
+            if self._last_access is not None:
+                self._last_access.pop(report_id, None)
+            self._report_bytes.pop(report_id, None)
+
+    def collect_garbage(self) -> int:
+        """Supprime les blobs qui ne sont plus référencés. Renvoie les octets libérés."""
+        freed = 0
+        if not os.path.isdir(self.blob_root):
+            return freed
+        with self._lock:
+            for dirpath, _, filenames in os.walk(self.blob_root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    st = os.lstat(path)
+                    if st.st_nlink <= 1:
+                        os.unlink(path)
+                        freed += st.st_size
+            self._used -= freed
+        return freed
+
+    def enforce_limits(
+        self, keep: Optional[Set[str]] = None, now: Optional[float] = None
+    ) -> List[str]:
+        """
+        Applique la rétention (rapports non consultés depuis `retention_days`)
+        puis le quota (éviction LRU par dernier accès). Renvoie les ids supprimés.
+        """
+        if not self.retention_days and not self.quota_bytes:
+            return []
+        keep = keep or set()
+        now = time.time() if now is None else now
+
+        # Ordre LRU depuis l'index : seuls les rapports évincés sont relus sur disque
+        candidates = sorted(
+            ((t, rid) for rid, t in self._load_index().items() if rid not in keep)
+        )
+        evicted: List[str] = []
+
+        if self.retention_days:
+            cutoff = now - self.retention_days * 86400
+            for last_access, rid in candidates:
+                if last_access < cutoff:
+                    self.delete_report(rid)
+                    evicted.append(rid)
+            candidates = [c for c in candidates if c[1] not in evicted]
+
+        if self.quota_bytes:
+            used = self._used
+            for _, rid in candidates:
+                if used <= self.quota_bytes:
+                    break
+                usage = self._report_usage(rid)
+                self.delete_report(rid)
+                evicted.append(rid)
+                used -= usage.exclusive_bytes
+
+        if evicted:
+            self.collect_garbage()
+        return evicted
+
+
+class StorageSweeper:
+    """
+    Applique rétention et quota en tâche de fond : toutes les `interval`
+    secondes, ou dès que `request()` est appelé (quota dépassé après une
+    écriture). `on_evicted` reçoit les ids supprimés (lignes en base).
+    """
+
+    def __init__(
+        self,
+        storage: Callable[[], ReportStorage],
+        on_evicted: Callable[[List[str]], Awaitable[None]],
+        interval: float,
+    ):
+        self._storage = storage
+        self._on_evicted = on_evicted
+        self._interval = interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def request(self) -> None:
+        self._wakeup.set()
+
+    async def sweep(self) -> List[str]:
+        evicted = await asyncio.to_thread(self._storage().enforce_limits)
+        if evicted:
+            await self._on_evicted(evicted)
+        return evicted
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self._interval)
+            self._wakeup.clear()
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"storage sweep failed: {e}", flush=True)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+_storages: Dict[str, ReportStorage] = {}
+
+
+def get_storage(root: str) -> ReportStorage:
+    """Instance partagée par racine, configurée depuis Settings."""
+    root = os.path.abspath(root)
+    storage = _storages.get(root)
+    if storage is None:
+        storage = ReportStorage(
+            root,
+            retention_days=settings.REPORT_RETENTION_DAYS,
+            quota_bytes=settings.REPORT_STORAGE_QUOTA_MB * 1024 * 1024,
+        )
+        _storages[root] = storage
+    return storage
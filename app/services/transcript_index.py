@@ -0,0 +1,193 @@
+"""
+Per-report transcript index.
+
+Persisted next to the exports as `.transcript-index.npz` (hidden: neither
+downloadable nor bundled). It holds the segments in columnar form sorted by
+start, the running maximum of segment ends (so an overlap query is two
+bisections) and an inverted word -> segment posting list.
+"""
+
+import base64
+import io
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import numpy as np
+
+from app.models.notes import MeetingSummary
+from app.services.reports import InvalidCursor
+from app.services.search import parse_timestamp_ms
+from app.services.segment_store import SegmentStore
+from app.services.storage import get_storage
+from app.utils.lru_cache import LRUCache
+
+INDEX_FILENAME = ".transcript-index.npz"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Lu depuis les threads du threadpool : get/put (move_to_end) sous verrou
+_loaded = LRUCache(capacity=32)
+_loaded_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    return [w.lower() for w in _WORD_RE.findall(text)]
+
+
+class TranscriptIndex:
+    def __init__(
+        self,
+        segments: SegmentStore,
+        vocab: np.ndarray,
+        postings: np.ndarray,
+        posting_offsets: np.ndarray,
+    ):
+        self.segments = segments
+        # Fins cumulées : max_end[i] = max(end[0..i]), croissant
+        self.max_end = (
+            np.maximum.accumulate(segments.end) if len(segments) else segments.end
+        )
+        self.vocab = vocab
+        self.postings = postings
+        self.posting_offsets = posting_offsets
+
+    @classmethod
+    def build(cls, segments: SegmentStore) -> "TranscriptIndex":
+        segments = segments.sorted()
+        by_word: Dict[str, List[int]] = {}
+        for i, text in enumerate(segments.texts()):
+            for word in set(tokenize(text)):
+                by_word.setdefault(word, []).append(i)
+        vocab = sorted(by_word)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum([len(by_word[w]) for w in vocab], out=offsets[1:])
+        postings = np.array([i for w in vocab for i in by_word[w]], dtype=np.int32)
+        return cls(segments, np.array(vocab, dtype=np.str_), postings, offsets)
+
+    # Requêtes
+
+    def range_for(self, t0: float, t1: float) -> Tuple[int, int]:
+        """
+        [lo, hi) : plus petite plage de segments (triés par début) contenant tous
+        ceux qui chevauchent [t0, t1). Deux bisections, O(log n).
+        """
+        hi = int(np.searchsorted(self.segments.start, t1, side="left"))
+        lo = int(np.searchsorted(self.max_end, t0, side="right"))
+        return lo, max(lo, hi)
+
+    def between(self, t0: float, t1: float) -> np.ndarray:
+        """Indices des segments qui chevauchent [t0, t1)."""
+        lo, hi = self.range_for(t0, t1)
+        return lo + np.flatnonzero(self.segments.end[lo:hi] > t0)
+
+    def lookup(self, word: str) -> np.ndarray:
+        """Segments contenant le mot (bisection dans le vocabulaire trié)."""
+        k = int(np.searchsorted(self.vocab, word.lower()))
+        if k == len(self.vocab) or self.vocab[k] != word.lower():
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.posting_offsets[k] : self.posting_offsets[k + 1]]
+
+    def matching(self, query: str) -> np.ndarray:
+        """Segments contenant tous les mots de la requête."""
+        result: Optional[np.ndarray] = None
+        for word in set(tokenize(query)):
+            hits = self.lookup(word)
+            result = hits if result is None else np.intersect1d(result, hits)
+        return np.empty(0, dtype=np.int32) if result is None else result
+
+    # Persistance
+
+    def to_bytes(self) -> bytes:
+        s = self.segments
+        text, text_offsets = s.text_buffer()
+        # Tours fusionnés : plages de segments d'origine (transcript.json)
+        extra: Dict[str, Any] = {} if s.source is None else {"source": s.source}
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            start=s.start,
+            end=s.end,
+            speaker_ids=s.speaker_ids,
+            speakers=np.array(s.speakers, dtype=np.str_),
+            text=np.frombuffer(text.encode("utf-8"), dtype=np.uint8),
+            text_offsets=text_offsets,
+            vocab=self.vocab,
+            postings=self.postings,
+            posting_offsets=self.posting_offsets,
+            **extra,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_file(cls, path: str) -> "TranscriptIndex":
+        with np.load(path, allow_pickle=False) as z:
+            segments = SegmentStore(
+                z["start"],
+                z["end"],
+                z["text"].tobytes().decode("utf-8"),
+                z["text_offsets"],
+                z["speaker_ids"],
+                [str(name) for name in z["speakers"]],
+                z["source"] if "source" in z.files else None,
+            )
+            return cls(segments, z["vocab"], z["postings"], z["posting_offsets"])
+
+
+def encode_segment_cursor(position: int) -> str:
+    """Curseur opaque : indice du dernier segment de la page."""
+    raw = f"seg|{position}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_segment_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        kind, position = raw.split("|")
+        if kind != "seg":
+            raise ValueError(kind)
+        return int(position)
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def save_transcript_index(segments: SegmentStore, out_dir: str) -> TranscriptIndex:
+    """Construit l'index d'un rapport et l'écrit dans le stockage dédupliqué."""
+    index = TranscriptIndex.build(segments)
+    storage = get_storage(os.path.dirname(os.path.abspath(out_dir)))
+    storage.write_artifact(os.path.join(out_dir, INDEX_FILENAME), index.to_bytes())
+    return index
+
+
+def load_transcript_index(report_dir: str) -> Optional[TranscriptIndex]:
+    """Index d'un rapport (mis en cache tant que le fichier ne change pas)."""
+    path = os.path.join(report_dir, INDEX_FILENAME)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = f"{path}:{st.st_mtime_ns}:{st.st_ino}"
+    with _loaded_lock:
+        cached = _loaded.get(key)
+    if cached is None:
+        # Lecture hors verrou : deux lectures concurrentes du même index sont
+        # possibles, sans effet autre que le travail en double
+        cached = {"index": TranscriptIndex.from_file(path)}
+        with _loaded_lock:
+            _loaded.put(key, cached)
+    return cast(TranscriptIndex, cached["index"])
+
+
+def resolve_topics(summary: MeetingSummary, index: TranscriptIndex) -> None:
+    """Renseigne topic.segment_range à partir des timestamps du LLM."""
+    for topic in summary.topics:
+        start_ms = parse_timestamp_ms(topic.start)
+        if start_ms is None:
+            continue
+        end_ms = parse_timestamp_ms(topic.end)
+        t0 = start_ms / 1000.0
+        t1 = end_ms / 1000.0 if end_ms is not None and end_ms > start_ms else t0 + 1e-3
+        lo, hi = index.range_for(t0, t1)
+        topic.segment_range = [lo, hi] if hi > lo else None
@@ -1,29 +1,95 @@
+import asyncio
+import contextvars
+import functools
 import io
+import math
+import time
+from dataclasses import dataclass
 from typing import Tuple, List, Dict
 
 from pydub import AudioSegment
 from pydub.utils import which
 from openai import OpenAI
 import os
+import struct
+import threading
 import httpx
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Tuple, Optional
+import numpy as np
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, BinaryIO, Callable, Tuple, Optional
 
 from app.core.config import settings
+from app.services import audio_probe, diarization_cache, usage
+from app.services.audio_codecs import UploadCodec, get_codec
+from app.services.audio_probe import AudioInfo, PcmLayout
+from app.services.fair_scheduler import scheduler
+from app.services.diarization import (
+    audio_to_samples,
+    diarize_audio,
+    overlap_speaker_labels,
+)
+from app.services.segment_store import NO_SPEAKER, SegmentStore
+from app.services.speaker_clustering import cluster_speaker_labels
 
 OPENAI_API_KEY = settings.OPENAI_API_KEY
 ASR_MODEL_ID = settings.ASR_MODEL_ID or "gpt-4o-mini-transcribe"
 BACKEND = getattr(settings, "BACKEND", None) or "openai"
 
 MAX_BYTES = 24 * 1024 * 1024  
-CHUNK_SEC = 600               
 
 AudioSegment.converter = which("ffmpeg")
 AudioSegment.ffmpeg = AudioSegment.converter
 AudioSegment.ffprobe = which("ffprobe")
 
+# Voie rapide : créneaux réservés, hors du pool équitable
+_fast_slots = threading.BoundedSemaphore(max(1, settings.ASR_FAST_LANE_SLOTS))
+# Exécuteurs dédiés : l'exécuteur par défaut est occupé par les longues
+# transcriptions qui attendent le pool équitable
+_fast_executor = ThreadPoolExecutor(
+    max(1, settings.ASR_FAST_LANE_SLOTS), thread_name_prefix="asr-fast"
+)
+_preflight_executor = ThreadPoolExecutor(
+    max(1, settings.ASR_PREFLIGHT_WORKERS), thread_name_prefix="asr-preflight"
+)
+
+
+async def _run_in(executor: Executor, fn: Callable[..., Any], *args: Any) -> Any:
+    """asyncio.to_thread sur `executor` (contexte copié : compteur d'usage)."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args)
+    return await loop.run_in_executor(executor, call)
+
+
 class TranscriptionError(Exception):
     pass
+
+
+class AudioRejected(TranscriptionError):
+    """Refus en préflight, avant tout décodage ou appel API."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class UploadPlan:
+    info: Optional[AudioInfo]  # None : format ou durée inconnus, décodage
+    lane: str  # fast | single | chunked
+    chunk_count: int  # 0 : inconnu avant décodage
+    size: int = 0
+    duration_sec: float = 0.0
+
+
+# Requête ASR : (décalage s, durée s, octets, nom de fichier)
+Job = Tuple[float, float, bytes, str]
+
+
+def estimate_chunks(duration_sec: float) -> int:
+    """Nombre de requêtes ASR après décodage, pour le codec d'envoi configuré."""
+    return max(1, math.ceil(duration_sec / get_codec().max_chunk_sec(MAX_BYTES)))
+
+
 from openai import OpenAI
 
 def _make_openai_client() -> OpenAI:
@@ -40,10 +106,8 @@ def _load_and_resample(file_bytes: bytes, filename: str) -> AudioSegment:
     audio = AudioSegment.from_file(buf)
     return audio.set_channels(1).set_frame_rate(16000)
 
-def _export_chunk_wav(seg: AudioSegment) -> bytes:
-    out = io.BytesIO()
-    seg.export(out, format="wav")
-    return out.getvalue()
+def _export_chunk(seg: AudioSegment, codec: UploadCodec) -> bytes:
+    return codec.export(seg)
 
 def _openai_stt_bytes(client: OpenAI, audio_bytes: bytes, fname: str, language_hint: str | None):
     bio = io.BytesIO(audio_bytes)
@@ -61,13 +125,22 @@ def _openai_stt_bytes(client: OpenAI, audio_bytes: bytes, fname: str, language_h
         language=(language_hint or None)  
     )
 
-def _parse_verbose_json(data: dict, language_hint: str | None):
+def _response_data(resp: Any) -> dict:
+    return {
+        "text": getattr(resp, "text", None),
+        "language": getattr(resp, "language", None),
+        "segments": getattr(resp, "segments", None),
+    }
+
+def _parse_verbose_json(
+    data: dict, language_hint: str | None
+) -> Tuple[str, SegmentStore, Optional[str]]:
   
     text = data.get("text") or ""
     language = data.get("language") or language_hint or "unknown"
 
     segments_json = data.get("segments") or []
-    segments = []
+    starts, ends, texts = [], [], []
 
     for s in segments_json:
         if isinstance(s, dict):
@@ -79,169 +152,378 @@ def _parse_verbose_json(data: dict, language_hint: str | None):
             end   = float(getattr(s, "end", 0.0)   or 0.0)
             text_s = (getattr(s, "text", "") or "").strip()
 
-        segments.append({"start": start, "end": end, "text": text_s})
+        starts.append(start)
+        ends.append(end)
+        texts.append(text_s)
 
-    if not segments:
-        segments = [{"start": 0.0, "end": 0.0, "text": text}]
+    if not texts:
+        starts, ends, texts = [0.0], [0.0], [text]
 
-    return text, segments, language
+    return text, SegmentStore.from_columns(starts, ends, texts), language
 
 def _openai_transcribe_chunked(file_bytes: bytes, filename: str, language_hint: str | None):
     if not OPENAI_API_KEY:
         raise TranscriptionError("OPENAI_API_KEY is missing.")
-    client = _make_openai_client()
-
     audio = _load_and_resample(file_bytes, filename)
+    return _openai_transcribe_audio(audio, language_hint)
 
-    single = _export_chunk_wav(audio)
-    if len(single) <= MAX_BYTES:
-        resp = _openai_stt_bytes(client, single, "chunk.wav", language_hint)
-        data = {
-            "text": getattr(resp, "text", None),
-            "language": getattr(resp, "language", None),
-            "segments": getattr(resp, "segments", None),
-        }
-        return _parse_verbose_json(data, language_hint)
 
-    total_ms = len(audio)
-    step = CHUNK_SEC * 1000
-    chunks: list[AudioSegment] = [audio[i:i+step] for i in range(0, total_ms, step)]
+def _fits_fast_lane(size: int, info: AudioInfo) -> bool:
+    return (
+        audio_probe.api_compatible(info)
+        and info.duration_sec is not None
+        and info.duration_sec <= settings.ASR_FAST_LANE_MAX_SEC
+        and size <= MAX_BYTES
+    )
+
+
+def preflight(upload: BinaryIO) -> UploadPlan:
+    """
+    Inspection des en-têtes seulement : durée, codec, fréquence, canaux.
+    `upload` est le fichier déjà reçu (le spool de la requête), jamais chargé
+    en mémoire ici. Refuse les fichiers trop gros, trop longs ou illisibles,
+    puis estime le nombre de chunks et choisit la voie de traitement.
+    """
+    size = upload.seek(0, os.SEEK_END)
+    upload.seek(0)
+    max_bytes = settings.ASR_MAX_UPLOAD_MB * 1024 * 1024
+    if max_bytes and size > max_bytes:
+        raise AudioRejected(f"File exceeds {settings.ASR_MAX_UPLOAD_MB} MB.", 413)
+    info = audio_probe.probe(upload)
+    if info is None:
+        if audio_probe.ffprobe_available():
+            raise AudioRejected("Unsupported or unreadable audio file.", 415)
+        # Sans ffprobe seul le WAV est inspecté : décodage classique pour le reste
+        return UploadPlan(None, "chunked", 0, size)
+    duration = info.duration_sec
+    if duration is None:
+        # WebM en flux (MediaRecorder) : durée mesurée au décodage
+        return UploadPlan(None, "chunked", 0, size)
+    if duration <= 0:
+        raise AudioRejected("Audio file is empty.", 400)
+    if settings.ASR_MAX_AUDIO_SEC and duration > settings.ASR_MAX_AUDIO_SEC:
+        raise AudioRejected(
+            f"Audio exceeds {settings.ASR_MAX_AUDIO_SEC:.0f} s ({duration:.0f} s).",
+            413,
+        )
+    chunk_count = estimate_chunks(duration)
+    if settings.ASR_FAST_LANE_MAX_SEC > 0 and _fits_fast_lane(size, info):
+        lane = "fast"
+    else:
+        lane = "single" if chunk_count == 1 else "chunked"
+    return UploadPlan(info, lane, chunk_count, size, duration)
+
+
+async def plan_upload(upload: BinaryIO) -> UploadPlan:
+    """Préflight hors de la boucle d'événements, sur ses threads dédiés."""
+    plan: UploadPlan = await _run_in(_preflight_executor, preflight, upload)
+    return plan
+
+
+def _openai_transcribe_fast(
+    file_bytes: bytes, container: str, duration_sec: float, language_hint: str | None
+) -> Tuple[str, SegmentStore, Optional[str]]:
+    """Clip court : fichier d'origine envoyé tel quel, sans décodage ni découpage."""
+    client = _make_openai_client()
+    started = time.perf_counter()
+    resp = _openai_stt_bytes(client, file_bytes, f"clip.{container}", language_hint)
+    usage.note_asr(duration_sec, 1, started)
+    return _parse_verbose_json(_response_data(resp), language_hint)
+
+
+def _transcribe_jobs(
+    client: OpenAI,
+    jobs: List[Job],
+    language_hint: str | None,
+    audio_sec: float,
+    started: float,
+) -> Tuple[str, SegmentStore, Optional[str]]:
+    """
+    jobs : (décalage s, durée s, octets, nom de fichier), soumis au pool
+    équitable (DRR) avec leur durée pour coût. Un job unique propage ses
+    erreurs ; en multi-chunks un chunk en échec est remplacé par un marqueur.
+    """
+    if len(jobs) == 1:
+        _, duration, data, fname = jobs[0]
+        # Même file équitable que les chunks : un clip court passe au prochain tour
+        resp = scheduler.submit(
+            lambda: _openai_stt_bytes(client, data, fname, language_hint),
+            cost=duration,
+        ).result()
+        usage.note_asr(audio_sec, 1, started)
+        return _parse_verbose_json(_response_data(resp), language_hint)
 
-    full_text_parts: list[str] = []
-    all_segments: list[Dict] = []
-    offset = 0.0
     language_final = language_hint or "unknown"
+    results = []
+
+    def fetch(job: Job) -> dict:
+        return _response_data(_openai_stt_bytes(client, job[2], job[3], language_hint))
+
+    futures = {
+        scheduler.submit(functools.partial(fetch, job), cost=job[1]): k
+        for k, job in enumerate(jobs)
+    }
+    for fut in as_completed(futures):
+        k = futures[fut]
+        offset = jobs[k][0]
+        try:
+            data = fut.result()
+        except Exception as e:
+            results.append((offset, f"[ERROR chunk {k}: {e}]", SegmentStore.empty()))
+            continue
+
+        t, segs, lang = _parse_verbose_json(data, language_hint)
+        if lang and language_final == "unknown":
+            language_final = lang
+
+        results.append((offset, t, segs))
+
+    usage.note_asr(audio_sec, len(jobs), started)
+    results.sort(key=lambda x: x[0])
+
+    full_text_parts = [t for _, t, _ in results if t]
+    all_segments = SegmentStore.concat(
+        [segs.shift(off) for off, _, segs in results if len(segs)]
+    ).sorted()
+
+    full_text = " ".join([p.strip() for p in full_text_parts if p.strip()])
+    if not len(all_segments):
+        all_segments = SegmentStore.from_columns([0.0], [0.0], [full_text])
+    return full_text, all_segments, language_final
+
+
+def _openai_transcribe_audio(
+    audio: AudioSegment, language_hint: str | None
+) -> Tuple[str, SegmentStore, Optional[str]]:
+    """
+    Transcrit un audio déjà décodé (16 kHz mono). Les chunks sont encodés avec
+    ASR_UPLOAD_CODEC, à la plus grande durée qui tient dans MAX_BYTES.
+    """
+    client = _make_openai_client()
+    started = time.perf_counter()
+    audio_sec = len(audio) / 1000.0
+    codec = get_codec()
+    chunk_sec = codec.max_chunk_sec(MAX_BYTES)
+
+    if audio_sec <= chunk_sec:
+        single = _export_chunk(audio, codec)
+        if len(single) <= MAX_BYTES:
+            jobs = [(0.0, audio_sec, single, f"chunk.{codec.format}")]
+            return _transcribe_jobs(client, jobs, language_hint, audio_sec, started)
+
+    total_ms = len(audio)
+    step = chunk_sec * 1000
+    chunks: list[AudioSegment] = [audio[i : i + step] for i in range(0, total_ms, step)]
 
     jobs = []
-    offsets = []  
 
     running_ms = 0
     for i, seg in enumerate(chunks):
-        b = _export_chunk_wav(seg)
-        parts = [seg[: len(seg)//2], seg[len(seg)//2:]] if len(b) > MAX_BYTES else [seg]
+        b = _export_chunk(seg, codec)
+        # Estimation de débit dépassée (bruit, FLAC peu compressible) : deux moitiés
+        parts = (
+            [seg[: len(seg) // 2], seg[len(seg) // 2 :]]
+            if len(b) > MAX_BYTES
+            else [seg]
+        )
 
         local_off = 0.0
         for j, sseg in enumerate(parts):
-            sb = _export_chunk_wav(sseg)
-            jobs.append((i, j, sb))
-            offsets.append(running_ms/1000.0 + local_off)
-            local_off += len(sseg)/1000.0
+            sb = b if len(parts) == 1 else _export_chunk(sseg, codec)
+            jobs.append(
+                (
+                    running_ms / 1000.0 + local_off,
+                    len(sseg) / 1000.0,
+                    sb,
+                    f"chunk_{i}_{j}.{codec.format}",
+                )
+            )
+            local_off += len(sseg) / 1000.0
 
         running_ms += len(seg)
 
+    return _transcribe_jobs(client, jobs, language_hint, audio_sec, started)
 
-    full_text_parts = []
-    all_segments = []
-    language_final = language_hint or "unknown"
-
-    def worker(args):
-        i, j, sb = args
-        resp = _openai_stt_bytes(client, sb, f"chunk_{i}_{j}.wav", language_hint)
-        data = {
-            "text": getattr(resp, "text", None),
-            "language": getattr(resp, "language", None),
-            "segments": getattr(resp, "segments", None),
-        }
-        return (i, j, data)
-
-    max_workers = 4
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = {ex.submit(worker, job): k for k, job in enumerate(jobs)}
-        for fut in as_completed(futures):
-            k = futures[fut]
-            try:
-                i, j, data = fut.result()
-            except Exception as e:
-                all_segments.append({"start": 0.0, "end": 0.0, "text": f"[ERROR chunk {k}: {e}]"})
-                continue
-
-            t, segs, lang = _parse_verbose_json(data, language_hint)
-            if lang and language_final == "unknown":
-                language_final = lang
-            if t:
-                full_text_parts.append(t)
-
-            off = offsets[k]
-            for s in segs:
-                s["start"] = float(s["start"]) + off
-                s["end"]   = float(s["end"]) + off
-                all_segments.append(s)
-        results = []  
-
-    def worker(args):
-        i, j, sb = args
-        resp = _openai_stt_bytes(client, sb, f"chunk_{i}_{j}.wav", language_hint)
-        data = {
-            "text": getattr(resp, "text", None),
-            "language": getattr(resp, "language", None),
-            "segments": getattr(resp, "segments", None),
-        }
-        return (i, j, data)
-
-    max_workers = 4
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = {ex.submit(worker, job): k for k, job in enumerate(jobs)}
-        for fut in as_completed(futures):
-            k = futures[fut]
-            try:
-                i, j, data = fut.result()
-            except Exception as e:
-                results.append((offsets[k], f"[ERROR chunk {k}: {e}]", []))
-                continue
-
-            t, segs, lang = _parse_verbose_json(data, language_hint)
-            if lang and language_final == "unknown":
-                language_final = lang
-
-            results.append((offsets[k], t, segs))
 
-    results.sort(key=lambda x: x[0])
+def _whole_file_passes(size: int, info: AudioInfo, duration_sec: float) -> bool:
+    """Fichier d'origine accepté par l'API en un seul appel : codec, taille, durée."""
+    return (
+        audio_probe.api_compatible(info)
+        and size <= MAX_BYTES
+        and duration_sec <= settings.ASR_MAX_CHUNK_SEC
+    )
 
-    full_text_parts = []
-    all_segments = []
-    for off, t, segs in results:
-        if t:
-            full_text_parts.append(t)
-        for s in segs:
-            s["start"] = float(s["start"]) + off
-            s["end"]   = float(s["end"]) + off
-            all_segments.append(s)
 
-    all_segments.sort(key=lambda s: s["start"])
+def _can_slice_pcm(pcm: PcmLayout) -> bool:
+    """
+    Tranches brutes seulement si elles ne pèsent pas plus que l'audio décodé
+    (16 bits, 16 kHz, mono) : au-delà, elles demanderaient plus d'appels que
+    le décodage n'en prévoit (estimate_chunks).
+    """
+    return pcm.channels == 1 and pcm.sample_rate <= 16000 and pcm.bits_per_sample <= 16
+
+
+def _wav_header(pcm: PcmLayout, data_size: int) -> bytes:
+    """En-tête PCM canonique (44 octets) pour une tranche des échantillons d'origine."""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, pcm.channels, pcm.sample_rate,
+        pcm.sample_rate * pcm.block_align, pcm.block_align, pcm.bits_per_sample,
+        b"data", data_size,
+    )  # fmt: skip
+
+
+def _pcm_jobs(file_bytes: bytes, pcm: PcmLayout) -> List[Job]:
+    """WAV PCM trop gros : tranches des échantillons (memoryview), en-tête refait."""
+    block = pcm.block_align
+    byte_rate = pcm.sample_rate * block
+    frames = min(
+        int(settings.ASR_MAX_CHUNK_SEC) * pcm.sample_rate, (MAX_BYTES - 44) // block
+    )
+    step = frames * block
+    size = pcm.data_size - pcm.data_size % block
+    samples = memoryview(file_bytes)[pcm.data_offset : pcm.data_offset + size]
+    jobs = []
+    for k, pos in enumerate(range(0, len(samples), step)):
+        piece = samples[pos : pos + step]
+        data = _wav_header(pcm, len(piece)) + piece
+        jobs.append((pos / byte_rate, len(piece) / byte_rate, data, f"chunk_{k}.wav"))
+    return jobs
+
+
+def _openai_transcribe_passthrough(
+    file_bytes: bytes,
+    container: str,
+    pcm: Optional[PcmLayout],
+    duration_sec: float,
+    language_hint: str | None,
+) -> Tuple[str, SegmentStore, Optional[str]]:
+    """
+    Sans ffmpeg : fichier d'origine tel quel, ou tranches du WAV PCM `pcm`
+    quand il en est fourni un.
+    """
+    client = _make_openai_client()
+    started = time.perf_counter()
+    if pcm is None:
+        jobs = [(0.0, duration_sec, file_bytes, f"upload.{container}")]
+    else:
+        jobs = _pcm_jobs(file_bytes, pcm)
+    return _transcribe_jobs(client, jobs, language_hint, duration_sec, started)
 
-    full_text = " ".join([p.strip() for p in full_text_parts if p.strip()])
-    if not all_segments:
-        all_segments = [{"start": 0.0, "end": 0.0, "text": full_text}]
-    return full_text, all_segments, language_final
-        
-    
 
-async def transcribe_audio(file_bytes: bytes, filename: str, language_hint: str | None = None):
+async def transcribe_audio(
+    file_bytes: bytes,
+    filename: str,
+    language_hint: str | None = None,
+    plan: Optional[UploadPlan] = None,
+):
+    """`plan` : préflight déjà fait sur le fichier reçu (sinon fait ici)."""
     if BACKEND != "openai":
         raise TranscriptionError("Set BACKEND=openai to use OpenAI STT.")
-    return _openai_transcribe_chunked(file_bytes, filename, language_hint)
+    if plan is None:
+        plan = await plan_upload(io.BytesIO(file_bytes))
+    info = plan.info
+    if info is not None and plan.lane == "fast" and _fast_slots.acquire(blocking=False):
+        try:
+            return await _run_in(
+                _fast_executor,
+                _openai_transcribe_fast,
+                file_bytes,
+                info.container,
+                plan.duration_sec,
+                language_hint,
+            )
+        finally:
+            _fast_slots.release()
+    size = len(file_bytes)
+    if info is not None and _whole_file_passes(size, info, plan.duration_sec):
+        return await asyncio.to_thread(
+            _openai_transcribe_passthrough,
+            file_bytes,
+            info.container,
+            None,
+            plan.duration_sec,
+            language_hint,
+        )
+    if info is not None and info.pcm is not None and _can_slice_pcm(info.pcm):
+        return await asyncio.to_thread(
+            _openai_transcribe_passthrough,
+            file_bytes,
+            info.container,
+            info.pcm,
+            plan.duration_sec,
+            language_hint,
+        )
+    # Décodage + appels HTTP bloquants : hors de la boucle d'événements
+    return await asyncio.to_thread(
+        _openai_transcribe_chunked, file_bytes, filename, language_hint
+    )
 
 
-'''async def transcribe_audio_with_advanced_diarization(
+async def transcribe_audio_with_advanced_diarization(
     audio_bytes: bytes,
     filename: str,
     language_hint: Optional[str] = None,
-) -> Tuple[str, List[Dict[str, Any]], Optional[str]]:
+    plan: Optional[UploadPlan] = None,
+) -> Tuple[str, SegmentStore, Optional[str]]:
     """
     Transcrit l'audio,Applique la diarisation avancée 
     Retourne texte + segments enrichis en 'speaker'
+    L'audio est décodé une seule fois ; ASR et pyannote tournent en parallèle,
+    la latence est donc celle de l'étape la plus lente.
     """
-    text, segs, lang = await transcribe_audio(
-        audio_bytes,
-        filename,
-        language_hint,
+    if BACKEND != "openai":
+        raise TranscriptionError("Set BACKEND=openai to use OpenAI STT.")
+    if not OPENAI_API_KEY:
+        raise TranscriptionError("OPENAI_API_KEY is missing.")
+
+    if plan is None:
+        await plan_upload(io.BytesIO(audio_bytes))
+    audio = await asyncio.to_thread(_load_and_resample, audio_bytes, filename)
+    key = await asyncio.to_thread(diarization_cache.cache_key, audio_bytes)
+
+    (text, segs, lang), speaker_segments = await asyncio.gather(
+        asyncio.to_thread(_openai_transcribe_audio, audio, language_hint),
+        asyncio.to_thread(diarize_audio, audio, key),
     )
 
-    speaker_segments = diarize_audio_bytes(audio_bytes)
+    segs = segs.with_speakers(
+        overlap_speaker_labels(segs.start, segs.end, speaker_segments)
+    )
 
-    segs_with_speakers = assign_speakers_by_overlap(segs, speaker_segments)
+    return text, segs, lang
 
-    return text, segs_with_speakers, lang'''
+async def transcribe_audio_with_clustering(
+    audio_bytes: bytes,
+    filename: str,
+    language_hint: Optional[str] = None,
+    max_speakers: int = 4,
+    plan: Optional[UploadPlan] = None,
+) -> Tuple[str, SegmentStore, Optional[str]]:
+    """
+    Transcrit l'audio puis regroupe les segments par speaker avec des
+    embeddings spectraux NumPy (sans pyannote ni token Hugging Face).
+    """
+    if BACKEND != "openai":
+        raise TranscriptionError("Set BACKEND=openai to use OpenAI STT.")
+    if not OPENAI_API_KEY:
+        raise TranscriptionError("OPENAI_API_KEY is missing.")
+
+    if plan is None:
+        await plan_upload(io.BytesIO(audio_bytes))
+    audio = await asyncio.to_thread(_load_and_resample, audio_bytes, filename)
+    text, segs, lang = await asyncio.to_thread(
+        _openai_transcribe_audio, audio, language_hint
+    )
+    labels = await asyncio.to_thread(
+        cluster_speaker_labels,
+        segs.start.tolist(),
+        segs.end.tolist(),
+        audio_to_samples(audio),
+        max_speakers,
+    )
+    return text, segs.with_speakers(labels), lang
 
 '''def assign_speakers_alternate(
     segments: List[Dict],
@@ -265,29 +547,57 @@ async def transcribe_audio(file_bytes: bytes, filename: str, language_hint: str
         prev_end = end
     return out'''
 def assign_speakers_round_robin(
-    segments: list[dict],
+    segments: SegmentStore,
     gap_threshold: float = 1.0,
     max_speakers: int = 6,
-) -> list[dict]:
-  
-    if not segments:
+) -> SegmentStore:
+    """
+    Change de speaker (Speaker 1..max_speakers, en boucle) après chaque pause
+    d'au moins `gap_threshold` secondes.
+    """
+    if not len(segments):
         return segments
 
-    current_speaker_idx = 1
-    prev_end = segments[0].get("end", 0.0)
-
-    segments[0]["speaker"] = f"Speaker {current_speaker_idx}"
-
-    for i in range(1, len(segments)):
-        seg = segments[i]
-        start = float(seg.get("start", prev_end))
-        end = float(seg.get("end", start))
-        gap = max(0.0, start - prev_end)
+    gaps = np.maximum(0.0, segments.start[1:] - segments.end[:-1])
+    turns = np.concatenate([[0], np.cumsum(gaps >= gap_threshold)])
+    numbers = (turns % max_speakers + 1).tolist()
+    return segments.with_speakers([f"Speaker {n}" for n in numbers])
 
-        if gap >= gap_threshold:
-            current_speaker_idx = (current_speaker_idx % max_speakers) + 1
 
-        seg["speaker"] = f"Speaker {current_speaker_idx}"
-        prev_end = end
+def merge_speaker_turns(
+    segments: SegmentStore,
+    max_duration: float = 60.0,
+) -> SegmentStore:
+    """
+    Fusionne les segments consécutifs d'un même speaker en un tour de parole,
+    sans dépasser `max_duration` secondes par tour. La colonne `source` donne,
+    pour chaque tour, [premier, dernier + 1] : indices des segments d'origine.
+    Les segments sans speaker ne sont pas fusionnés.
+    """
+    starts = segments.start.tolist()
+    ends = segments.end.tolist()
+    ids = segments.speaker_ids.tolist()
+    texts = [t.strip() for t in segments.texts()]
+
+    bounds: List[List[int]] = []
+    for i, (start, end, speaker) in enumerate(zip(starts, ends, ids)):
+        if (
+            bounds
+            and speaker != NO_SPEAKER
+            and ids[bounds[-1][0]] == speaker
+            and end - starts[bounds[-1][0]] <= max_duration
+        ):
+            bounds[-1][1] = i + 1
+        else:
+            bounds.append([i, i + 1])
 
-    return segments
+    first = np.array([a for a, _ in bounds], dtype=np.int64)
+    turns = SegmentStore.from_columns(
+        [starts[a] for a, _ in bounds],
+        [max(ends[a:b]) for a, b in bounds],
+        [" ".join(t for t in texts[a:b] if t) for a, b in bounds],
+    )
+    turns.speaker_ids = segments.speaker_ids[first]
+    turns.speakers = segments.speakers
+    turns.source = np.array(bounds, dtype=np.int64).reshape(-1, 2)
+    return turns
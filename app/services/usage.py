@@ -0,0 +1,169 @@
+"""
+Usage ledger.
+
+Each request gets a `UsageMeter` bound to its context (a ContextVar, copied
+by asyncio.to_thread into the transcription threads); the services add audio
+seconds, chunk count, ASR latency and chat tokens to it. Once the request is
+done, `ledger.record` appends one row to an in-memory buffer — no I/O on the
+request path. A background task writes the buffer with one executemany
+INSERT every USAGE_FLUSH_INTERVAL_SEC seconds, or as soon as
+USAGE_BATCH_SIZE rows are waiting.
+"""
+
+import asyncio
+import contextlib
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import sessionmanager
+from app.models.usage import UsageRecord
+
+
+@dataclass
+class UsageMeter:
+    audio_sec: float = 0.0
+    chunk_count: int = 0
+    asr_latency_ms: float = 0.0
+    llm_model: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+_current: ContextVar[Optional[UsageMeter]] = ContextVar("usage_meter", default=None)
+
+
+def start_meter() -> UsageMeter:
+    """Nouveau compteur pour la requête (le contexte courant et ses threads)."""
+    meter = UsageMeter()
+    _current.set(meter)
+    return meter
+
+
+def note_asr(audio_sec: float, chunk_count: int, started: float) -> None:
+    """`started` : time.perf_counter() relevé avant le premier appel ASR."""
+    meter = _current.get()
+    if meter is None:
+        return
+    meter.audio_sec += audio_sec
+    meter.chunk_count += chunk_count
+    meter.asr_latency_ms += (time.perf_counter() - started) * 1000.0
+
+
+def note_llm(model: Optional[str], usage: Any) -> None:
+    """`usage` : champ usage d'une réponse chat.completions (peut être absent)."""
+    meter = _current.get()
+    if meter is None or usage is None:
+        return
+    meter.llm_model = model
+    meter.prompt_tokens += int(getattr(usage, "prompt_tokens", 0) or 0)
+    meter.completion_tokens += int(getattr(usage, "completion_tokens", 0) or 0)
+
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+class UsageLedger:
+    def __init__(
+        self,
+        session_factory: SessionFactory,
+        batch_size: int = settings.USAGE_BATCH_SIZE,
+        flush_interval: float = settings.USAGE_FLUSH_INTERVAL_SEC,
+        max_buffer: int = settings.USAGE_BUFFER_MAX,
+    ):
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def record(
+        self,
+        endpoint: str,
+        meter: UsageMeter,
+        user_id: Optional[int] = None,
+        api_token_id: Optional[int] = None,
+        report_id: Optional[str] = None,
+    ) -> None:
+        """Ajoute une ligne au tampon (appelé depuis la boucle d'événements)."""
+        self._buffer.append(
+            dict(
+                asdict(meter),
+                created_at=datetime.utcnow(),
+                user_id=user_id,
+                api_token_id=api_token_id,
+                endpoint=endpoint,
+                report_id=report_id,
+            )
+        )
+        self._trim()
+        if len(self._buffer) >= self._batch_size:
+            self._wakeup.set()
+
+    def _trim(self) -> None:
+        if len(self._buffer) > self._max_buffer:
+            # Base indisponible trop longtemps : on perd les plus anciennes
+            overflow = len(self._buffer) - self._max_buffer
+            del self._buffer[:overflow]
+            self.dropped += overflow
+
+    async def flush(self) -> int:
+        """Écrit le tampon en un INSERT groupé. Retourne le nombre de lignes écrites."""
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        try:
+            async with self._session_factory() as session:
+                await session.execute(insert(UsageRecord), rows)
+                await session.commit()
+        except Exception as e:
+            # Remises en tête du tampon pour le prochain passage
+            self._buffer[:0] = rows
+            self._trim()
+            self.failures += 1
+            print(f"usage flush failed ({len(rows)} rows): {e}", flush=True)
+            return 0
+        self.flushed += len(rows)
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arrête la tâche de fond puis vide le tampon."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failures": self.failures,
+        }
+
+
+ledger = UsageLedger(sessionmanager.session)
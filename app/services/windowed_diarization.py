@@ -0,0 +1,170 @@
+"""
+Windowed diarization for long recordings.
+
+The waveform is cut into overlapping windows diarized independently (in the
+resident worker pool when it runs, so in parallel), which bounds pyannote's
+memory by the window size. Local speaker labels are re-linked across windows
+by cosine similarity of their embeddings, each window keeps the turns of the
+time span it owns (overlaps are split at their midpoint), and the result is
+merged into one list of speaker turns.
+"""
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# (turns locaux, {label local: embedding})
+WindowResult = Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]
+WindowRunner = Callable[[Sequence[np.ndarray], int], List[WindowResult]]
+
+# Similarité cosinus minimale pour rattacher un speaker local à un speaker connu
+LINK_THRESHOLD = 0.5
+
+
+def plan_windows(
+    n_samples: int, sample_rate: int, window_sec: float, overlap_sec: float
+) -> List[Tuple[int, int]]:
+    """Fenêtres [début, fin) en échantillons, se chevauchant de `overlap_sec`."""
+    window = int(window_sec * sample_rate)
+    step = max(1, window - int(overlap_sec * sample_rate))
+    if n_samples <= window:
+        return [(0, n_samples)]
+    bounds = []
+    start = 0
+    while True:
+        end = min(start + window, n_samples)
+        bounds.append((start, end))
+        if end >= n_samples:
+            return bounds
+        start += step
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-8))
+
+
+def link_speakers(
+    window_embeddings: Sequence[Dict[str, np.ndarray]],
+    durations: Sequence[Dict[str, float]],
+    threshold: float = LINK_THRESHOLD,
+) -> List[Dict[str, int]]:
+    """
+    Associe chaque speaker local (par fenêtre) à un speaker global.
+    Glouton par similarité décroissante, un-pour-un au sein d'une fenêtre ;
+    les centroïdes globaux sont la moyenne des embeddings pondérée par le temps
+    de parole.
+    """
+    centroids: List[np.ndarray] = []
+    weights: List[float] = []
+    mappings: List[Dict[str, int]] = []
+
+    for embeddings, spoken in zip(window_embeddings, durations):
+        pairs = sorted(
+            (
+                (_cosine(emb, centroid), label, g)
+                for label, emb in embeddings.items()
+                for g, centroid in enumerate(centroids)
+            ),
+            reverse=True,
+        )
+        mapping: Dict[str, int] = {}
+        taken = set()
+        for sim, label, g in pairs:
+            if sim < threshold:
+                break
+            if label in mapping or g in taken:
+                continue
+            mapping[label] = g
+            taken.add(g)
+        for label in sorted(embeddings):
+            if label not in mapping:
+                centroids.append(np.zeros_like(embeddings[label], dtype=np.float64))
+                weights.append(0.0)
+                mapping[label] = len(centroids) - 1
+
+        for label, g in mapping.items():
+            w = max(spoken.get(label, 0.0), 1e-3)
+            centroids[g] = (centroids[g] * weights[g] + embeddings[label] * w) / (
+                weights[g] + w
+            )
+            weights[g] += w
+        mappings.append(mapping)
+    return mappings
+
+
+def merge_window_turns(
+    windows: Sequence[Tuple[float, float]],
+    window_turns: Sequence[List[Dict[str, Any]]],
+    mappings: Sequence[Dict[str, int]],
+) -> List[Dict[str, Any]]:
+    """
+    Ramène les tours locaux en temps absolu, ne garde que la zone possédée par
+    chaque fenêtre (coupure au milieu des chevauchements) et fusionne les tours
+    contigus d'un même speaker. Un label local sans embedding (tour trop court
+    pour en extraire un) reçoit un nouveau speaker global.
+    """
+    next_id = 1 + max((g for m in mappings for g in m.values()), default=-1)
+    owned = []
+    for k, (start, end) in enumerate(windows):
+        lo = start if k == 0 else (start + windows[k - 1][1]) / 2
+        hi = end if k == len(windows) - 1 else (windows[k + 1][0] + end) / 2
+        owned.append((lo, hi))
+
+    turns = []
+    for (w_start, _), (lo, hi), local_turns, mapping in zip(
+        windows, owned, window_turns, mappings
+    ):
+        mapping = dict(mapping)
+        for turn in local_turns:
+            t0 = max(lo, w_start + float(turn["start"]))
+            t1 = min(hi, w_start + float(turn["end"]))
+            if t1 > t0:
+                label = str(turn["speaker"])
+                if label not in mapping:
+                    mapping[label] = next_id
+                    next_id += 1
+                turns.append((t0, t1, mapping[label]))
+
+    turns.sort()
+    merged: List[List[Any]] = []
+    for t0, t1, g in turns:
+        if merged and merged[-1][2] == g and t0 - merged[-1][1] < 1e-3:
+            merged[-1][1] = max(merged[-1][1], t1)
+        else:
+            merged.append([t0, t1, g])
+
+    # Numérotation globale par ordre d'apparition
+    names: Dict[int, str] = {}
+    return [
+        {
+            "start": t0,
+            "end": t1,
+            "speaker": names.setdefault(g, f"SPEAKER_{len(names):02d}"),
+        }
+        for t0, t1, g in merged
+    ]
+
+
+def diarize_windowed(
+    samples: np.ndarray,
+    sample_rate: int,
+    window_sec: float,
+    overlap_sec: float,
+    run_windows: WindowRunner,
+) -> List[Dict[str, Any]]:
+    """Diarisation par fenêtres ; `run_windows` diarise une liste de tranches."""
+    bounds = plan_windows(len(samples), sample_rate, window_sec, overlap_sec)
+    results = run_windows([samples[a:b] for a, b in bounds], sample_rate)
+
+    window_turns = [turns for turns, _ in results]
+    spoken = []
+    for turns in window_turns:
+        per_speaker: Dict[str, float] = {}
+        for t in turns:
+            label = str(t["speaker"])
+            per_speaker[label] = per_speaker.get(label, 0.0) + t["end"] - t["start"]
+        spoken.append(per_speaker)
+
+    mappings = link_speakers([emb for _, emb in results], spoken)
+    windows = [(a / sample_rate, b / sample_rate) for a, b in bounds]
+    return merge_window_turns(windows, window_turns, mappings)
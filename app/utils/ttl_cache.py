@@ -0,0 +1,53 @@
+"""
+TTL Cache implementation.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class TTLCache(OrderedDict[str, Tuple[float, Any]]):
+    """Bounded cache whose entries expire after a per-entry time to live."""
+
+    def __init__(self, capacity: int, ttl: float):
+        super().__init__()
+        self._capacity = capacity
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:  # type: ignore[override]
+        """Get a live item and mark it as recently used."""
+        entry = super().get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self[key]
+            self.misses += 1
+            return default
+        self.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an item for min(ttl, default ttl) seconds."""
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        if ttl <= 0:
+            return
+        self[key] = (time.monotonic() + ttl, value)
+        self.move_to_end(key)
+        if len(self) > self._capacity:
+            self.popitem(last=False)
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Remove every entry whose value matches. Returns the number removed."""
+        keys = [key for key, (_, value) in self.items() if predicate(value)]
+        for key in keys:
+            del self[key]
+        return len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,71 @@
+"""
+Benchmark: sweep-line assign_speakers_by_overlap vs the former O(n·m) scan.
+
+    python -m benchmarks.bench_speaker_assignment
+"""
+
+import random
+import time
+from typing import Any, Dict, List
+
+from app.services.diarization import assign_speakers_by_overlap
+
+
+def naive_assign(
+    text_segments: List[Dict[str, Any]], speaker_segments: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    results = []
+    for seg in text_segments:
+        ts = float(seg.get("start", 0.0))
+        te = float(seg.get("end", ts))
+        best_speaker, best_ov = None, 0.0
+        for sp in speaker_segments:
+            ov = max(0.0, min(te, sp["end"]) - max(ts, sp["start"]))
+            if ov > best_ov:
+                best_ov, best_speaker = ov, sp["speaker"]
+        results.append({**seg, "speaker": best_speaker or "UNKNOWN"})
+    return results
+
+
+def meeting(n_text: int, n_turns: int, hours: float = 3.0) -> tuple:
+    rng = random.Random(0)
+    total = hours * 3600
+    text_segments, t = [], 0.0
+    step = total / n_text
+    for _ in range(n_text):
+        dur = rng.uniform(0.5, step * 1.5)
+        text_segments.append({"start": t, "end": t + dur, "text": "..."})
+        t += step
+    speaker_segments, t = [], 0.0
+    step = total / n_turns
+    for _ in range(n_turns):
+        dur = rng.uniform(0.2, step * 1.2)
+        speaker_segments.append(
+            {"start": t, "end": t + dur, "speaker": f"SPEAKER_{rng.randrange(6):02d}"}
+        )
+        t += step
+    return text_segments, speaker_segments
+
+
+def timed(fn: Any, *args: Any) -> tuple:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    for n_text, n_turns in [(500, 500), (2000, 2000), (5000, 4000)]:
+        text_segments, speaker_segments = meeting(n_text, n_turns)
+        fast, t_fast = timed(
+            assign_speakers_by_overlap, text_segments, speaker_segments
+        )
+        slow, t_slow = timed(naive_assign, text_segments, speaker_segments)
+        assert fast == slow
+        print(
+            f"text={n_text:5d} turns={n_turns:5d}  naive={t_slow * 1000:9.1f} ms  "
+            f"sweep={t_fast * 1000:7.1f} ms  speedup x{t_slow / t_fast:6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Any, Dict, Optional
+
 import streamlit as st
 import requests
 
@@ -86,9 +88,12 @@ with st.sidebar:
     st.header("⚙️ Settings")
 
     language_hint = st.selectbox("🌍 Language", ["auto", "en", "fr"], index=0)
-    diarization = st.selectbox("Speaker segmentation", ["none", "alternate"])
+    diarization = st.selectbox(
+        "Speaker segmentation", ["none", "alternate", "cluster", "advanced"]
+    )
     gap_threshold = st.slider("Pause threshold (seconds)", 0.2, 5.0, 1.0)
     max_speakers = st.slider("Max number of speakers", 1, 8, 4)
+    merge_turns = st.checkbox("Merge consecutive segments of a speaker", value=True)
     export_pdf = st.checkbox("Export report as PDF", value=True)
 
     st.markdown("---")
@@ -112,6 +117,20 @@ if audio_file:
 
 st.markdown("</div>", unsafe_allow_html=True)
 
+def _load_segment_page(state: dict, limit: int = 200) -> None:
+    """Ajoute la page de segments suivante à l'état de la transcription."""
+    params = {"limit": limit}
+    if state["next_cursor"]:
+        params["cursor"] = state["next_cursor"]
+    res = requests.get(f"{API_URL}{state['segments_url']}", params=params, timeout=60)
+    if not res.ok:
+        st.error("Could not load segments.")
+        return
+    page = res.json()
+    state["segments"].extend(page.get("segments", []))
+    state["next_cursor"] = page.get("next_cursor")
+
+
 # =====================
 # Action buttons
 # =====================
@@ -128,14 +147,14 @@ if run_transcription:
     if not audio_file:
         st.warning("Please upload an audio file first.")
     else:
-        
-        st.subheader("🗣️ Transcription")
-
         params = {
             "diarization": diarization,
             "gap_threshold": gap_threshold,
             "max_speakers": max_speakers,
+            "merge_turns": merge_turns,
             "language_hint": lang_to_send,
+            # Les segments sont chargés page par page (segments_url)
+            "include_segments": "false",
         }
         files = {
             "file": (
@@ -155,25 +174,44 @@ if run_transcription:
 
         if not res.ok:
             st.error("Transcription failed. Please check API quota or backend.")
+            st.session_state.pop("transcription", None)
         else:
             data = res.json()
-            transcript = data["transcript"]
-
-            st.success(f"Detected language: {transcript.get('language', 'unknown')}")
-
-            st.markdown("#### Full text")
-            st.write(transcript.get("text", ""))
-
-            st.markdown("#### Segments")
-            for i, s in enumerate(transcript.get("segments", [])):
-                speaker = s.get("speaker") or ""
-                st.markdown(
-                    f"**{i+1}. {speaker}** "
-                    f"[{s.get('start',0):.2f}s → {s.get('end',0):.2f}s]  \n"
-                    f"{s.get('text','')}"
-                )
-
-        st.markdown("</div>", unsafe_allow_html=True)
+            st.session_state["transcription"] = {
+                "transcript": data["transcript"],
+                # Rapport persisté : /notes le reprend sans renvoyer l'audio
+                "report_id": data.get("report_id"),
+                "audio_key": (audio_file.name, audio_file.size),
+                "segments_url": data.get("segments_url"),
+                "segments": [],
+                "next_cursor": None,
+            }
+            if data.get("segments_url"):
+                _load_segment_page(st.session_state["transcription"])
+
+if "transcription" in st.session_state:
+    state = st.session_state["transcription"]
+    transcript = state["transcript"]
+
+    st.subheader("🗣️ Transcription")
+    st.success(f"Detected language: {transcript.get('language', 'unknown')}")
+
+    st.markdown("#### Full text")
+    st.write(transcript.get("text") or "")
+
+    st.markdown(
+        f"#### Segments ({len(state['segments'])} / {transcript.get('segment_count', 0)})"
+    )
+    for i, s in enumerate(state["segments"]):
+        speaker = s.get("speaker") or ""
+        st.markdown(
+            f"**{i+1}. {speaker}** "
+            f"[{s.get('start',0):.2f}s → {s.get('end',0):.2f}s]  \n"
+            f"{s.get('text','')}"
+        )
+    if state["next_cursor"] and st.button("Load more segments"):
+        _load_segment_page(state)
+        st.rerun()
 
 # =====================
 # Meeting report results
@@ -185,24 +223,33 @@ if run_report:
         
         st.subheader("📄 Meeting report")
 
-        files = {
-            "file": (
-                audio_file.name,
-                audio_file.getvalue(),
-                audio_file.type or "audio/mpeg",
-            )
-        }
         data = {
             "language_hint": lang_to_send,
             "diarization": diarization,
             "gap_threshold": str(gap_threshold),
             "export_pdf": str(export_pdf).lower(),
         }
+        transcribed = st.session_state.get("transcription") or {}
+        notes_files: Optional[Dict[str, Any]] = None
+        if transcribed.get("report_id") and transcribed.get("audio_key") == (
+            audio_file.name,
+            audio_file.size,
+        ):
+            # Déjà transcrit : notes ajoutées au même rapport
+            data["report_id"] = transcribed["report_id"]
+        else:
+            notes_files = {
+                "file": (
+                    audio_file.name,
+                    audio_file.getvalue(),
+                    audio_file.type or "audio/mpeg",
+                )
+            }
 
         with st.spinner("Generating meeting report..."):
             res = requests.post(
                 f"{API_URL}/reports/notes",
-                files=files,
+                files=notes_files,
                 data=data,
                 timeout=3600,
             )
@@ -247,24 +294,21 @@ if run_report:
             st.markdown("#### Download exports")
             exports = result.get("exports", {})
 
+            # Liens directs : le navigateur télécharge en flux depuis l'API,
+            # sans recharger chaque fichier en mémoire côté Streamlit.
+            if exports.get("bundle_url"):
+                st.link_button(
+                    "Download all (ZIP)",
+                    f"{API_URL}{exports['bundle_url']}",
+                    use_container_width=True,
+                )
+
             if exports.get("markdown_url"):
-                md_res = requests.get(f"{API_URL}{exports['markdown_url']}")
-                if md_res.ok:
-                    st.download_button(
-                        "Download Markdown",
-                        md_res.content,
-                        file_name="meeting-notes.md",
-                        mime="text/markdown",
-                    )
+                st.link_button(
+                    "Download Markdown", f"{API_URL}{exports['markdown_url']}"
+                )
 
             if exports.get("pdf_url"):
-                pdf_res = requests.get(f"{API_URL}{exports['pdf_url']}")
-                if pdf_res.ok:
-                    st.download_button(
-                        "Download PDF",
-                        pdf_res.content,
-                        file_name="meeting-report.pdf",
-                        mime="application/pdf",
-                    )
+                st.link_button("Download PDF", f"{API_URL}{exports['pdf_url']}")
 
         st.markdown("</div>", unsafe_allow_html=True)
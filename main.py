@@ -1,7 +1,6 @@
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os   
 
 from app.api.auth import router as auth_router
@@ -11,14 +10,24 @@ from typing import AsyncGenerator
 from app.db.session import sessionmanager
 from contextlib import asynccontextmanager
 import bcrypt
-from app.api.reports import router as reports_router
+from app.api.reports import router as reports_router, storage_sweeper
+from app.services import diarization_worker, usage
+import asyncio
 
 if not hasattr(bcrypt, "__about__"):
     bcrypt.__about__ = type("about", (object,), {"__version__": bcrypt.__version__})
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    if settings.DIARIZATION_WORKER:
+        # Préchauffage : pyannote est chargé avant la première requête
+        await asyncio.to_thread(diarization_worker.start)
+    usage.ledger.start()
+    storage_sweeper.start()
     yield
+    await storage_sweeper.stop()
+    await usage.ledger.stop()
+    diarization_worker.stop()
     if sessionmanager._engine is not None:
         await sessionmanager.close()
 
@@ -29,16 +38,13 @@ app = FastAPI(
     openapi_url=f"{settings.API_PREFIX}/openapi.json",
     docs_url=f"{settings.API_PREFIX}/docs",
     redoc_url=f"{settings.API_PREFIX}/redoc",
+    lifespan=lifespan,
 )
 
 DATA_ROOT = os.getenv("DATA_ROOT", "/data/reports")
 os.makedirs(DATA_ROOT, exist_ok=True)   
 
-app.mount(
-    "/reports/files",
-    StaticFiles(directory=DATA_ROOT),
-    name="reports_files",
-)
+# /reports/files est servi par download_report_file (négociation gzip/br, ETag, Range)
 
 # CORS
 app.add_middleware(
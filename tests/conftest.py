@@ -10,7 +10,9 @@ from app.db.base import Base
 from app.db.session import AsyncSession, DatabaseSessionManager, get_db
 
 # DONT REMOVE
+from app.models.report import Report
 from app.models.user import APIToken, User
+from app.models.usage import UsageRecord
 from main import app
 
 TEST_DATABASE_URL = settings.TEST_DATABASE_URL
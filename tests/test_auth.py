@@ -8,7 +8,7 @@ from httpx import AsyncClient
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, get_password_hash
+from app.core.security import create_access_token, get_password_hash, hash_api_token
 from app.models.user import APIToken, User
 
 
@@ -35,7 +35,7 @@ async def jwt_token(test_user: User) -> str:
 @pytest_asyncio.fixture
 async def api_token(test_user: User, session: AsyncSession) -> str:
     token_str = secrets.token_hex(32)
-    token = APIToken(token=token_str, user_id=test_user.id)
+    token = APIToken(token_hash=hash_api_token(token_str), user_id=test_user.id)
     session.add(token)
     await session.commit()
     return token_str
@@ -155,3 +155,92 @@ async def test_me_unauthorized(async_client: AsyncClient) -> None:
 async def test_api_me_unauthorized(async_client: AsyncClient) -> None:
     response = await async_client.get("auth/api-me")
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_hits_and_invalidation(
+    async_client: AsyncClient, session: AsyncSession
+) -> None:
+    user = User(username="cached-user", hashed_password=get_password_hash("secret123"))
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    token = create_access_token("t", str(user.id))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    before = (await async_client.get("/metrics")).json()["principal_cache"]
+    for _ in range(3):
+        response = await async_client.get("auth/me", headers=headers)
+        assert response.json()["username"] == "cached-user"
+    after = (await async_client.get("/metrics")).json()["principal_cache"]
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+    # Une modification de l'utilisateur invalide ses entrées (flush ORM, pour
+    # déclencher after_update ; setattr car la colonne n'est pas typée)
+    setattr(user, "username", "renamed-user")
+    await session.commit()
+    response = await async_client.get("auth/me", headers=headers)
+    assert response.json()["username"] == "renamed-user"
+
+
+@pytest.mark.asyncio
+async def test_api_token_is_stored_hashed_and_revocable(
+    async_client: AsyncClient, session: AsyncSession, jwt_token: str
+) -> None:
+    response = await async_client.post(
+        "auth/api-token", headers={"Authorization": jwt_token}
+    )
+    token = response.json()["api_token"]
+    result = await session.execute(
+        select(APIToken).where(APIToken.token_hash == hash_api_token(token))
+    )
+    assert result.scalar_one_or_none() is not None
+
+    headers = {"X-API-Token": token}
+    for _ in range(2):
+        assert (
+            await async_client.get("auth/api-me", headers=headers)
+        ).status_code == 200
+
+    response = await async_client.delete("auth/api-token", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = await async_client.get("auth/api-me", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password_hash(
+    async_client: AsyncClient, session: AsyncSession
+) -> None:
+    from passlib.context import CryptContext
+
+    from app.core.security import pwd_context
+
+    weak_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret123")
+    user = User(username="legacy-user", hashed_password=weak_hash)
+    session.add(user)
+    await session.commit()
+
+    response = await async_client.post(
+        "auth/login", json={"username": "legacy-user", "password": "secret123"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    await session.refresh(user)
+    assert user.hashed_password != weak_hash
+    assert not pwd_context.needs_update(user.hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_login_is_shed_when_hashing_queue_is_full(
+    async_client: AsyncClient, test_user: User, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.core import security
+
+    monkeypatch.setattr(security, "_pending", 10_000)
+    response = await async_client.post(
+        "auth/login", json={"username": "testuser", "password": "secret123"}
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "1"
@@ -7,3 +7,23 @@ async def test_read_main(async_client: AsyncClient) -> None:
     response = await async_client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+@pytest.mark.asyncio
+async def test_metrics_and_sqlite_profile(async_client: AsyncClient) -> None:
+    from sqlalchemy import text
+
+    from tests.conftest import test_db
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert set(response.json()) >= {"principal_cache", "db_pool"}
+
+    before = test_db.pool_stats()["checkouts"]
+    async with test_db.session() as session:
+        mode = (await session.execute(text("PRAGMA journal_mode"))).scalar()
+        sync = (await session.execute(text("PRAGMA synchronous"))).scalar()
+    assert (mode, sync) == ("wal", 1)  # 1 = NORMAL
+    stats = test_db.pool_stats()
+    assert stats["checkouts"] == before + 1
+    assert stats["wait_max_ms"] >= 0.0
@@ -0,0 +1,500 @@
+import gzip
+import io
+import json
+import os
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import create_access_token, get_password_hash
+from app.models.notes import MeetingSummary, Topic
+from app.models.report import Report
+from app.models.user import User
+from app.services.notes import save_markdown, save_transcript_json
+
+
+@pytest.fixture
+def data_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr("app.api.reports.DATA_ROOT", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def report_md(data_root: Path) -> str:
+    md_text = "# Meeting Report\n\n" + "Decision: ship it.\n" * 200
+    save_markdown(md_text, os.path.join(data_root, "r1"))
+    return md_text
+
+
+@pytest.mark.asyncio
+async def test_save_markdown_writes_compressed_variants(
+    data_root: Path, report_md: str
+) -> None:
+    md_path = data_root / "r1" / "meeting-notes.md"
+    gz_path = Path(str(md_path) + ".gz")
+    assert gz_path.is_file()
+    assert gzip.decompress(gz_path.read_bytes()).decode("utf-8") == report_md
+
+
+@pytest.mark.asyncio
+async def test_download_negotiates_gzip(
+    async_client: AsyncClient, report_md: str
+) -> None:
+    response = await async_client.get(
+        "/reports/files/r1/meeting-notes.md", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == report_md
+
+
+@pytest.mark.asyncio
+async def test_download_if_none_match_returns_304(
+    async_client: AsyncClient, report_md: str
+) -> None:
+    headers = {"Accept-Encoding": "identity"}
+    first = await async_client.get(
+        "/reports/files/r1/meeting-notes.md", headers=headers
+    )
+    etag = first.headers["etag"]
+    assert not etag.startswith("W/")
+
+    second = await async_client.get(
+        "/reports/files/r1/meeting-notes.md",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert second.status_code == status.HTTP_304_NOT_MODIFIED
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+
+
+@pytest.mark.asyncio
+async def test_download_range(async_client: AsyncClient, report_md: str) -> None:
+    response = await async_client.get(
+        "/reports/files/r1/meeting-notes.md",
+        headers={"Accept-Encoding": "identity", "Range": "bytes=0-15"},
+    )
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == report_md.encode("utf-8")[:16]
+
+
+@pytest.mark.asyncio
+async def test_download_missing_file(
+    async_client: AsyncClient, data_root: Path
+) -> None:
+    response = await async_client.get("/reports/files/r1/missing.md")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest_asyncio.fixture
+async def report_owner(session: AsyncSession) -> User:
+    result = await session.execute(select(User).where(User.username == "reportowner"))
+    user = result.scalar_one_or_none()
+    if user is None:
+        user = User(username="reportowner", hashed_password=get_password_hash("pw"))
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        base = datetime(2026, 1, 1)
+        for i in range(5):
+            session.add(
+                Report(
+                    id=f"owner-report-{i}",
+                    owner_id=user.id,
+                    created_at=base + timedelta(minutes=i),
+                    updated_at=base + timedelta(minutes=i),
+                    language="fr",
+                )
+            )
+        session.add(Report(id="anonymous-report", owner_id=None, language="en"))
+        await session.commit()
+        await session.refresh(user)
+    return cast(User, user)
+
+
+@pytest.mark.asyncio
+async def test_list_reports_keyset_pagination(
+    async_client: AsyncClient, report_owner: User
+) -> None:
+    token = create_access_token("t", str(report_owner.id))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = await async_client.get("/reports?limit=2", headers=headers)
+    assert first.status_code == status.HTTP_200_OK
+    page = first.json()
+    assert [r["id"] for r in page["items"]] == ["owner-report-4", "owner-report-3"]
+    assert page["next_cursor"]
+
+    seen = [r["id"] for r in page["items"]]
+    cursor = page["next_cursor"]
+    while cursor:
+        response = await async_client.get(
+            "/reports", params={"limit": 2, "cursor": cursor}, headers=headers
+        )
+        page = response.json()
+        seen.extend(r["id"] for r in page["items"])
+        cursor = page["next_cursor"]
+
+    assert seen == [f"owner-report-{i}" for i in range(4, -1, -1)]
+
+
+@pytest.mark.asyncio
+async def test_list_reports_requires_auth(async_client: AsyncClient) -> None:
+    response = await async_client.get("/reports")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_list_reports_invalid_cursor(
+    async_client: AsyncClient, report_owner: User
+) -> None:
+    token = create_access_token("t", str(report_owner.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await async_client.get("/reports?cursor=%%%", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_download_bundle_streams_all_artifacts(
+    async_client: AsyncClient, data_root: Path, report_md: str
+) -> None:
+    save_transcript_json(
+        {"language": "fr", "text": "bonjour", "segments": []},
+        os.path.join(data_root, "r1"),
+    )
+    (data_root / "r1" / "meeting-notes.srt").write_text(
+        "1\n00:00:00,000 --> 00:00:01,000\nbonjour\n"
+    )
+
+    response = await async_client.get("/reports/files/r1/bundle.zip")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == [
+            "meeting-notes.md",
+            "meeting-notes.srt",
+            "transcript.json",
+        ]
+        assert zf.read("meeting-notes.md").decode("utf-8") == report_md
+        assert json.loads(zf.read("transcript.json"))["text"] == "bonjour"
+
+
+@pytest.mark.asyncio
+async def test_download_bundle_unknown_report(
+    async_client: AsyncClient, data_root: Path
+) -> None:
+    response = await async_client.get("/reports/files/nope/bundle.zip")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_notes_are_indexed_for_search(
+    async_client: AsyncClient,
+    data_root: Path,
+    report_owner: User,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def fake_notes(transcript_text: str, language: Any = None) -> MeetingSummary:
+        return MeetingSummary(
+            executive_summary="Quarterly planning.",
+            decisions=["Freeze the marketing budget"],
+        )
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    token = create_access_token("t", str(report_owner.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    transcript = {
+        "text": "Hello everyone. The budget review is next week.",
+        "segments": [
+            {"start": 0.0, "end": 1.5, "text": "Hello everyone.", "speaker": "A"},
+            {
+                "start": 61.25,
+                "end": 64.0,
+                "text": "The budget review is next week.",
+                "speaker": "B",
+            },
+        ],
+    }
+    response = await async_client.post(
+        "/reports/notes",
+        data={"transcript": json.dumps(transcript), "language_hint": "en"},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    report_id = response.json()["report_id"]
+
+    response = await async_client.get("/reports/search?q=budget", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    hits = [h for h in response.json()["hits"] if h["report_id"] == report_id]
+    assert {h["kind"] for h in hits} == {"segment", "decision"}
+    segment_hit = next(h for h in hits if h["kind"] == "segment")
+    assert segment_hit["start_ms"] == 61250
+    assert segment_hit["speaker"] == "B"
+    assert "[budget]" in segment_hit["snippet"]
+
+
+@pytest.mark.asyncio
+async def test_report_segments_by_time_and_word(
+    async_client: AsyncClient,
+    data_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def fake_notes(transcript_text: str, language: Any = None) -> MeetingSummary:
+        return MeetingSummary(
+            executive_summary="Weekly sync.",
+            topics=[Topic(title="Budget", start="00:01:00", end="00:02:00")],
+        )
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    transcript = {
+        "text": "...",
+        "segments": [
+            {"start": 0.0, "end": 30.0, "text": "Welcome back.", "speaker": "A"},
+            {"start": 30.0, "end": 65.0, "text": "First the budget.", "speaker": "B"},
+            {"start": 65.0, "end": 110.0, "text": "Budget is frozen.", "speaker": "A"},
+            {"start": 130.0, "end": 140.0, "text": "Bye.", "speaker": "B"},
+        ],
+    }
+    response = await async_client.post(
+        "/reports/notes", data={"transcript": json.dumps(transcript)}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["summary"]["topics"][0]["segment_range"] == [1, 3]
+    report_id = body["report_id"]
+
+    response = await async_client.get(f"/reports/{report_id}/segments?from=60&to=120")
+    assert response.json()["indices"] == [1, 2]
+
+    response = await async_client.get(f"/reports/{report_id}/segments?q=BUDGET")
+    segments = response.json()["segments"]
+    assert [s["text"] for s in segments] == ["First the budget.", "Budget is frozen."]
+
+    response = await async_client.get("/reports/unknown/segments")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_report_segments_require_owner(
+    async_client: AsyncClient,
+    data_root: Path,
+    report_owner: User,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        "app.api.reports.generate_structured_notes",
+        lambda text, language=None: MeetingSummary(executive_summary="Private."),
+    )
+    token = create_access_token("t", str(report_owner.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    transcript = {"text": "...", "segments": [{"start": 0.0, "end": 1.0, "text": "hi"}]}
+    response = await async_client.post(
+        "/reports/notes",
+        data={"transcript": json.dumps(transcript)},
+        headers=headers,
+    )
+    report_id = response.json()["report_id"]
+
+    response = await async_client.get(f"/reports/{report_id}/segments", headers=headers)
+    assert response.json()["indices"] == [0]
+
+    # Rapport d'un autre principal : introuvable
+    response = await async_client.get(f"/reports/{report_id}/segments")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_report_segments_cursor_pagination(
+    async_client: AsyncClient,
+    data_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        "app.api.reports.generate_structured_notes",
+        lambda text, language=None: MeetingSummary(executive_summary="Long meeting."),
+    )
+    transcript = {
+        "text": "...",
+        "segments": [
+            {"start": float(i), "end": i + 1.0, "text": f"part {i}"} for i in range(25)
+        ],
+    }
+    response = await async_client.post(
+        "/reports/notes",
+        data={"transcript": json.dumps(transcript), "include_transcript": "false"},
+    )
+    body = response.json()
+    assert body["transcript_text"] is None
+    url = body["exports"]["segments_url"]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        page = (await async_client.get(url, params=params)).json()
+        seen.extend(page["indices"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == list(range(25))
+
+    response = await async_client.get(url, params={"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_notes_usage_is_buffered_then_flushed(
+    async_client: AsyncClient,
+    data_root: Path,
+    report_owner: User,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from types import SimpleNamespace
+
+    from app.core.security import hash_api_token
+    from app.models.usage import UsageRecord
+    from app.models.user import APIToken
+    from app.services import usage
+    from tests.conftest import test_db
+
+    owner_id = report_owner.id
+    token = APIToken(token_hash=hash_api_token("usage-token"), user_id=owner_id)
+    session.add(token)
+    await session.flush()
+    token_id = token.id
+    await session.commit()
+
+    def fake_notes(transcript_text: str, language: Any = None) -> MeetingSummary:
+        usage.note_llm(
+            "gpt-4o-mini", SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+        )
+        return MeetingSummary(executive_summary="ok")
+
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    monkeypatch.setattr(usage.ledger, "_session_factory", test_db.session)
+
+    response = await async_client.post(
+        "/reports/notes",
+        data={"transcript": "hello"},
+        headers={"X-API-Token": "usage-token"},
+    )
+    report_id = response.json()["report_id"]
+    assert usage.ledger.stats()["buffered"] >= 1
+
+    assert await usage.ledger.flush() >= 1
+    assert usage.ledger.stats()["buffered"] == 0
+    record = (
+        await session.execute(
+            select(UsageRecord).where(UsageRecord.report_id == report_id)
+        )
+    ).scalar_one()
+    assert (record.user_id, record.api_token_id, record.endpoint) == (
+        owner_id,
+        token_id,
+        "notes",
+    )
+    assert (record.prompt_tokens, record.completion_tokens) == (120, 30)
+    assert record.llm_model == "gpt-4o-mini"
+
+
+@pytest.mark.asyncio
+async def test_merged_turns_resolve_to_saved_source_segments(
+    async_client: AsyncClient,
+    data_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.services.segment_store import SegmentStore
+
+    async def fake_transcribe(*args: Any, **kwargs: Any) -> tuple:
+        texts = ["Hello.", "Budget first.", "Then hiring."]
+        segs = SegmentStore.from_columns([0.0, 2.0, 4.0], [2.0, 4.0, 6.0], texts)
+        return " ".join(texts), segs, "en"
+
+    monkeypatch.setattr("app.api.reports.transcribe_audio", fake_transcribe)
+    files = {"file": ("memo.bin", b"audio", "application/octet-stream")}
+    response = await async_client.post(
+        "/reports/transcribe",
+        params={"diarization": "alternate", "merge_turns": "true"},
+        files=files,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    turns = body["transcript"]["segments"]
+    assert [(t["text"], t["source_range"]) for t in turns] == [
+        ("Hello. Budget first. Then hiring.", [0, 3])
+    ]
+
+    # Les plages désignent les segments ASR enregistrés avec le rapport
+    report_id = body["report_id"]
+    with open(os.path.join(data_root, report_id, "transcript.json")) as f:
+        saved = json.load(f)
+    lo, hi = turns[0]["source_range"]
+    assert [s["text"] for s in saved["source_segments"][lo:hi]] == [
+        "Hello.",
+        "Budget first.",
+        "Then hiring.",
+    ]
+    response = await async_client.get(f"/reports/{report_id}/segments")
+    assert response.json()["segments"][0]["source_range"] == [0, 3]
+
+
+@pytest.mark.asyncio
+async def test_notes_reuse_transcribed_report(
+    async_client: AsyncClient,
+    data_root: Path,
+    report_owner: User,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.services.segment_store import SegmentStore
+
+    async def fake_transcribe(*args: Any, **kwargs: Any) -> tuple:
+        texts = ["Budget review.", "Ship it."]
+        segs = SegmentStore.from_columns([0.0, 5.0], [5.0, 9.0], texts)
+        return "Budget review. Ship it.", segs, "en"
+
+    def fake_notes(transcript_text: str, language: Any = None) -> MeetingSummary:
+        assert transcript_text == "Budget review. Ship it."
+        return MeetingSummary(executive_summary="ok", decisions=["Ship the release"])
+
+    monkeypatch.setattr("app.api.reports.transcribe_audio", fake_transcribe)
+    monkeypatch.setattr("app.api.reports.generate_structured_notes", fake_notes)
+    token = create_access_token("t", str(report_owner.id))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    files = {"file": ("memo.bin", b"audio", "application/octet-stream")}
+    response = await async_client.post(
+        "/reports/transcribe", files=files, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    report_id = response.json()["report_id"]
+
+    # Sans l'audio : la transcription enregistrée est reprise, même rapport
+    response = await async_client.post(
+        "/reports/notes", data={"report_id": report_id}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["report_id"] == report_id
+
+    report = await session.get(Report, report_id)
+    assert report is not None and report.markdown_path
+    assert os.path.exists(os.path.join(data_root, report_id, "meeting-notes.md"))
+
+    response = await async_client.get("/reports/search?q=ship", headers=headers)
+    hits = [h for h in response.json()["hits"] if h["report_id"] == report_id]
+    assert sorted(h["kind"] for h in hits) == ["decision", "segment"]
+
+    # Rapport d'un autre principal : introuvable
+    response = await async_client.post("/reports/notes", data={"report_id": report_id})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
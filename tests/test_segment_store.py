@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.services.segment_store import SegmentStore
+
+
+def test_shift_concat_sort_and_slice() -> None:
+    a = SegmentStore.from_columns([0.0, 5.0], [5.0, 9.0], ["un", "deux"], ["A", None])
+    b = SegmentStore.from_columns(
+        [1.0, 0.0], [2.0, 1.0], ["quatre", "trois"], ["B", "A"]
+    )
+
+    merged = SegmentStore.concat([a, b.shift(10.0)]).sorted()
+
+    assert merged.start.tolist() == [0.0, 5.0, 10.0, 11.0]
+    assert merged.texts() == ["un", "deux", "trois", "quatre"]
+    assert merged.speaker_labels() == ["A", None, "A", "B"]
+    assert merged.speakers == ["A", "B"]
+
+    window = merged.slice_time(6.0, 10.5)
+    assert window.texts() == ["deux", "trois"]
+    assert window.to_dicts() == [
+        {"start": 5.0, "end": 9.0, "text": "deux"},
+        {"start": 10.0, "end": 11.0, "text": "trois", "speaker": "A"},
+    ]
+
+
+def test_round_trip_and_footprint() -> None:
+    segments = [
+        {
+            "start": float(i),
+            "end": i + 0.9,
+            "text": f"segment {i} é",
+            "speaker": f"S{i % 3}",
+        }
+        for i in range(10_000)
+    ]
+    store = SegmentStore.from_segments(segments)
+
+    assert store.to_dicts() == segments
+    assert store.to_schema()[42].text == "segment 42 é"
+    assert np.all(np.diff(store.start) > 0)
+    # Colonnes + tampon texte : ~40 octets/segment, contre plusieurs centaines en dicts
+    assert store.nbytes() < 50 * len(segments)
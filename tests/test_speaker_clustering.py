@@ -0,0 +1,101 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.services.speaker_clustering import assign_speakers_by_clustering
+
+SR = 16000
+VOICES = {
+    "A": (110.0, (700.0, 1200.0, 2500.0)),
+    "B": (220.0, (400.0, 2000.0, 2900.0)),
+    "C": (160.0, (500.0, 900.0, 2300.0)),
+}
+
+
+def _voice(
+    rng: np.random.Generator, f0: float, formants: Sequence[float], dur: float
+) -> np.ndarray:
+    """Son voisé synthétique : harmoniques de f0 pondérées par des formants."""
+    t = np.arange(int(dur * SR)) / SR
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.03 * np.sin(2 * np.pi * 3 * t))) / SR
+    sig = sum(
+        np.sin(h * phase)
+        / h
+        * sum(np.exp(-(((h * f0 - f) / 150) ** 2)) for f in formants)
+        for h in range(1, 40)
+    )
+    sig = sig + 0.02 * rng.standard_normal(len(t))
+    out: np.ndarray = sig / np.abs(sig).max() * 0.5
+    return out
+
+
+def _meeting(pattern: str, jitter: float = 0.05) -> Tuple[List[Dict], np.ndarray]:
+    rng = np.random.default_rng(7)
+    segments, chunks, t = [], [], 0.0
+    for who in pattern:
+        dur = float(rng.uniform(1.0, 3.0))
+        f0, formants = VOICES[who]
+        f0 *= rng.uniform(1 - jitter, 1 + jitter)
+        chunks.append(_voice(rng, f0, formants, dur))
+        segments.append({"start": t, "end": t + dur, "text": who})
+        t += dur
+    return segments, (np.concatenate(chunks) * 32767).astype(np.int16)
+
+
+def _partition(segments: List[Dict]) -> Dict[str, set]:
+    groups: Dict[str, set] = {}
+    for seg in segments:
+        groups.setdefault(seg["speaker"], set()).add(seg["text"])
+    return groups
+
+
+def test_clustering_separates_speakers_with_automatic_count() -> None:
+    segments, samples = _meeting("ABCABCCBAACB")
+    result = assign_speakers_by_clustering(segments, samples, max_speakers=4)
+
+    assert result[0]["speaker"] == "Speaker 1"
+    assert sorted(map(sorted, _partition(result).values())) == [["A"], ["B"], ["C"]]
+
+
+def test_clustering_single_speaker() -> None:
+    segments, samples = _meeting("AAAAAAAA", jitter=0.0)
+    result = assign_speakers_by_clustering(segments, samples, max_speakers=4)
+    assert {s["speaker"] for s in result} == {"Speaker 1"}
+
+
+def test_clustering_short_segments_follow_neighbour() -> None:
+    segments, samples = _meeting("ABAB")
+    segments.insert(
+        2, {"start": segments[1]["end"] - 0.1, "end": segments[1]["end"], "text": "B"}
+    )
+    result = assign_speakers_by_clustering(segments, samples, max_speakers=2)
+    assert result[2]["speaker"] == result[1]["speaker"]
+
+
+def test_clustering_short_segments_follow_nearest_in_time() -> None:
+    rng = np.random.default_rng(3)
+    a = _voice(rng, *VOICES["A"], 2.0)
+    b = _voice(rng, *VOICES["B"], 2.0)
+    silence = np.zeros(int(7.6 * SR))
+    audio = np.concatenate([a, a[: int(0.4 * SR)], silence, b, a, b])
+    samples = (audio * 32767).astype(np.int16)
+    segments = [
+        {"start": 0.0, "end": 2.0, "text": "A"},
+        {"start": 2.0, "end": 2.2, "text": "A"},
+        # Plus proche de B par l'indice, de A dans le temps
+        {"start": 2.2, "end": 2.4, "text": "A"},
+        {"start": 10.0, "end": 12.0, "text": "B"},
+        {"start": 12.0, "end": 14.0, "text": "A"},
+        {"start": 14.0, "end": 16.0, "text": "B"},
+    ]
+    result = assign_speakers_by_clustering(segments, samples, max_speakers=2)
+    assert sorted(map(sorted, _partition(result).values())) == [["A"], ["B"]]
+
+
+def test_kmeans_distances_match_broadcast_form() -> None:
+    from app.services.speaker_clustering import _sq_distances
+
+    rng = np.random.default_rng(0)
+    x, c = rng.standard_normal((50, 38)), rng.standard_normal((6, 38))
+    expected = ((x[:, None, :] - c[None]) ** 2).sum(-1)
+    assert np.allclose(_sq_distances(x, c), expected)
@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from app.services.storage import ReportStorage, StorageSweeper
+
+
+def test_identical_artifacts_are_deduplicated(tmp_path: Path) -> None:
+    storage = ReportStorage(str(tmp_path))
+    a = storage.put_bytes("r1", "meeting-notes.md", b"same content")
+    b = storage.put_bytes("r2", "meeting-notes.md", b"same content")
+
+    assert os.stat(a).st_ino == os.stat(b).st_ino
+    blobs = [f for _, _, files in os.walk(storage.blob_root) for f in files]
+    assert len(blobs) == 1
+    assert storage.refcount(blobs[0]) == 2
+
+
+def test_deleted_report_blobs_are_collected(tmp_path: Path) -> None:
+    storage = ReportStorage(str(tmp_path))
+    storage.put_bytes("r1", "a.md", b"only in r1")
+    storage.put_bytes("r1", "shared.md", b"shared")
+    storage.put_bytes("r2", "shared.md", b"shared")
+
+    storage.delete_report("r1")
+    freed = storage.collect_garbage()
+
+    assert freed == len(b"only in r1")
+    assert (tmp_path / "r2" / "shared.md").read_bytes() == b"shared"
+
+
+def test_quota_evicts_least_recently_accessed(tmp_path: Path) -> None:
+    storage = ReportStorage(str(tmp_path), quota_bytes=2500)
+    for i, rid in enumerate(["old", "mid", "new"]):
+        storage.put_bytes(rid, "meeting-notes.md", bytes([i]) * 1000)
+        os.utime(storage.report_dir(rid), (1000 + i, 1000 + i))
+
+    # "old" est consulté : c'est "mid" qui devient le moins récemment utilisé
+    storage.touch("old")
+
+    assert storage.enforce_limits() == ["mid"]
+    assert sorted(storage.iter_report_ids()) == ["new", "old"]
+    assert storage.disk_usage() == 2000
+
+
+def test_retention_removes_stale_reports(tmp_path: Path) -> None:
+    storage = ReportStorage(str(tmp_path), retention_days=7)
+    storage.put_bytes("stale", "meeting-notes.md", b"stale")
+    storage.put_bytes("fresh", "meeting-notes.md", b"fresh")
+    now = os.stat(storage.report_dir("fresh")).st_mtime
+    os.utime(storage.report_dir("stale"), (now - 8 * 86400, now - 8 * 86400))
+
+    assert storage.enforce_limits(now=now) == ["stale"]
+    assert list(storage.iter_report_ids()) == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_background_sweep_uses_running_totals(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    storage = ReportStorage(str(tmp_path), quota_bytes=2500)
+    storage.put_bytes("old", "a.md", b"a" * 1000)
+    assert storage.enforce_limits() == []  # premier balayage : index construit
+    assert storage.used_bytes() == 1000
+
+    # Ensuite plus aucun parcours complet : compteurs tenus par les écritures
+    def no_walk() -> int:
+        raise AssertionError("full walk")
+
+    monkeypatch.setattr(storage, "disk_usage", no_walk)
+    storage.put_bytes("mid", "a.md", b"b" * 1000)
+    storage.put_bytes("new", "a.md", b"c" * 1000)
+    storage.put_bytes("new", "copy.md", b"c" * 1000)  # dédupliqué
+    assert storage.used_bytes() == 3000
+    assert storage.report_bytes("new") == 2000
+    assert storage.over_quota()
+
+    deleted: List[List[str]] = []
+
+    async def on_evicted(report_ids: List[str]) -> None:
+        deleted.append(report_ids)
+
+    storage._last_access["old"] = 1000.0  # type: ignore[index]  # le plus ancien
+    sweeper = StorageSweeper(lambda: storage, on_evicted, interval=3600)
+    assert await sweeper.sweep() == ["old"]
+    assert deleted == [["old"]]
+    assert storage.used_bytes() == 2000
+    assert not storage.over_quota()
@@ -0,0 +1,355 @@
+import functools
+import time
+from typing import Any, List, Optional
+
+import pytest
+
+from app.services import transcription
+from app.services.segment_store import SegmentStore
+
+
+@pytest.mark.asyncio
+async def test_advanced_diarization_runs_asr_and_diarization_concurrently(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    decoded = object()
+    calls = []
+
+    def fake_decode(file_bytes: bytes, filename: str) -> Any:
+        calls.append("decode")
+        return decoded
+
+    def fake_asr(audio: Any, language_hint: Any) -> tuple:
+        assert audio is decoded
+        time.sleep(0.3)
+        segs = SegmentStore.from_columns([0.0, 2.0], [2.0, 4.0], ["bonjour", "salut"])
+        return "bonjour salut", segs, "fr"
+
+    def fake_diarize(audio: Any, cache_key: Optional[str] = None) -> list:
+        assert audio is decoded
+        time.sleep(0.3)
+        return [
+            {"start": 0.0, "end": 2.1, "speaker": "SPEAKER_00"},
+            {"start": 2.1, "end": 4.0, "speaker": "SPEAKER_01"},
+        ]
+
+    monkeypatch.setattr(transcription, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(transcription, "_load_and_resample", fake_decode)
+    monkeypatch.setattr(transcription, "_openai_transcribe_audio", fake_asr)
+    monkeypatch.setattr(transcription, "diarize_audio", fake_diarize)
+
+    t0 = time.perf_counter()
+    text, segs, lang = await transcription.transcribe_audio_with_advanced_diarization(
+        b"...", "meeting.wav", None
+    )
+    elapsed = time.perf_counter() - t0
+
+    assert calls == ["decode"]
+    assert elapsed < 0.55
+    assert segs.speaker_labels() == ["SPEAKER_00", "SPEAKER_01"]
+    assert (text, lang) == ("bonjour salut", "fr")
+
+
+def test_merge_speaker_turns_caps_duration_and_keeps_source_range() -> None:
+    segs = [
+        {"start": 0.0, "end": 20.0, "text": "a", "speaker": "S1"},
+        {"start": 20.0, "end": 40.0, "text": "b", "speaker": "S1"},
+        {"start": 40.0, "end": 70.0, "text": "c", "speaker": "S1"},
+        {"start": 70.0, "end": 75.0, "text": "d", "speaker": "S2"},
+        {"start": 75.0, "end": 80.0, "text": "e", "speaker": None},
+        {"start": 80.0, "end": 85.0, "text": "f", "speaker": None},
+    ]
+
+    turns = transcription.merge_speaker_turns(
+        SegmentStore.from_segments(segs), max_duration=60.0
+    ).to_dicts()
+
+    assert [(t["text"], t["source_range"]) for t in turns] == [
+        ("a b", [0, 2]),
+        ("c", [2, 3]),
+        ("d", [3, 4]),
+        ("e", [4, 5]),
+        ("f", [5, 6]),
+    ]
+    assert (turns[0]["start"], turns[0]["end"]) == (0.0, 40.0)
+
+
+def test_fair_scheduler_serves_short_job_before_long_backlog() -> None:
+    import threading
+
+    from app.services.fair_scheduler import FairScheduler
+
+    scheduler = FairScheduler(workers=1, quantum=60.0)
+    gate = threading.Event()
+    order: List[str] = []
+    scheduler.submit(gate.wait, cost=1.0, principal="gate")
+    futures = [
+        scheduler.submit(
+            functools.partial(order.append, f"big{k}"), cost=600.0, principal="user:1"
+        )
+        for k in range(3)
+    ]
+    futures.append(
+        scheduler.submit(lambda: order.append("small"), cost=10.0, principal="user:2")
+    )
+    gate.set()
+    for fut in futures:
+        fut.result(timeout=5)
+    assert order == ["small", "big0", "big1", "big2"]
+
+    failing = scheduler.submit(lambda: 1 / 0, cost=1.0, principal="user:3")
+    with pytest.raises(ZeroDivisionError):
+        failing.result(timeout=5)
+
+
+def _wav_bytes(seconds: float, rate: int = 16000) -> bytes:
+    import io
+    import wave
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buf.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_short_wav_takes_fast_lane_without_decoding(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from types import SimpleNamespace
+
+    from app.services import audio_probe
+
+    info = audio_probe.probe_wav(_wav_bytes(2.5))
+    assert info is not None
+    assert (info.container, info.sample_rate, info.channels) == ("wav", 16000, 1)
+    assert info.duration_sec == pytest.approx(2.5)
+    assert audio_probe.probe_wav(b"ID3not a wav") is None
+
+    sent = []
+
+    def fake_stt(
+        client: Any, audio_bytes: bytes, fname: str, language_hint: Any
+    ) -> Any:
+        sent.append((fname, len(audio_bytes)))
+        return SimpleNamespace(text="salut", language="fr", segments=None)
+
+    def no_decode(file_bytes: bytes, filename: str) -> Any:
+        raise AssertionError("fast lane must not decode")
+
+    monkeypatch.setattr(transcription, "_openai_stt_bytes", fake_stt)
+    monkeypatch.setattr(transcription, "_load_and_resample", no_decode)
+
+    clip = _wav_bytes(2.5)
+    text, segs, lang = await transcription.transcribe_audio(clip, "memo.wav")
+    assert (text, lang) == ("salut", "fr")
+    assert sent == [("clip.wav", len(clip))]
+
+    # Hors voie rapide : passthrough via le pool équitable, toujours sans décodage
+    monkeypatch.setattr(transcription.settings, "ASR_FAST_LANE_MAX_SEC", 1.0)
+    await transcription.transcribe_audio(clip, "memo.wav")
+    assert sent[-1] == ("upload.wav", len(clip))
+
+
+@pytest.mark.asyncio
+async def test_fast_lane_checks_codec_and_runs_on_its_own_executor(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import threading
+    from types import SimpleNamespace
+
+    from app.services import audio_probe
+
+    # Même conteneur annoncé par ffprobe, codecs refusés par l'API
+    aac = audio_probe.AudioInfo("mp4", 5.0, codec="aac")
+    assert transcription._fits_fast_lane(1, aac)
+    for container, codec in [("mp4", "alac"), ("mp4", "amr_nb"), ("webm", "aac")]:
+        info = audio_probe.AudioInfo(container, 5.0, codec=codec)
+        assert not transcription._fits_fast_lane(1, info)
+        assert not transcription._whole_file_passes(1, info, 5.0)
+
+    threads = []
+
+    def fake_stt(
+        client: Any, audio_bytes: bytes, fname: str, language_hint: Any
+    ) -> Any:
+        threads.append(threading.current_thread().name)
+        return SimpleNamespace(text="salut", language="fr", segments=None)
+
+    monkeypatch.setattr(transcription, "_openai_stt_bytes", fake_stt)
+    await transcription.transcribe_audio(_wav_bytes(1.0), "memo.wav")
+    assert threads and threads[0].startswith("asr-fast")
+
+
+def test_preflight_estimates_chunks_and_rejects_before_decoding(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import io
+
+    from app.services import audio_probe
+
+    monkeypatch.setattr(transcription.settings, "ASR_UPLOAD_CODEC", "wav")
+    upload = io.BytesIO(_wav_bytes(2.0))
+    plan = transcription.preflight(upload)
+    assert plan.info is not None and upload.tell() == 0
+    assert (plan.lane, plan.chunk_count, plan.info.codec) == ("fast", 1, "pcm_16")
+
+    monkeypatch.setattr(
+        audio_probe,
+        "probe",
+        lambda data: audio_probe.AudioInfo("mp3", 1500.0, 44100, 2, "mp3"),
+    )
+    plan = transcription.preflight(io.BytesIO(b"25 min mp3"))
+    assert (plan.lane, plan.chunk_count) == ("chunked", 3)
+
+    monkeypatch.setattr(transcription.settings, "ASR_MAX_AUDIO_SEC", 600.0)
+    with pytest.raises(transcription.AudioRejected) as exc:
+        transcription.preflight(io.BytesIO(b"25 min mp3"))
+    assert exc.value.status_code == 413
+
+    # WebM de MediaRecorder : ni conteneur ni piste n'annoncent la durée
+    streamed = audio_probe.AudioInfo("webm", None, codec="opus")
+    monkeypatch.setattr(audio_probe, "probe", lambda data: streamed)
+    plan = transcription.preflight(io.BytesIO(b"streamed webm"))
+    assert (plan.info, plan.lane, plan.chunk_count) == (None, "chunked", 0)
+
+    monkeypatch.setattr(audio_probe, "probe", lambda data: None)
+    monkeypatch.setattr(audio_probe, "ffprobe_available", lambda: True)
+    with pytest.raises(transcription.AudioRejected) as exc:
+        transcription.preflight(io.BytesIO(b"not audio"))
+    assert exc.value.status_code == 415
+
+
+def test_probe_reads_spooled_file_and_stream_duration(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import json
+    import subprocess
+    import tempfile
+    from types import SimpleNamespace
+
+    from app.services import audio_probe
+
+    # WAV : seul l'en-tête est lu, la taille vient du fichier
+    spool = tempfile.SpooledTemporaryFile(max_size=1024)
+    spool.write(_wav_bytes(3.0))
+    spool.seek(100)
+    info = audio_probe.probe(spool)  # type: ignore[arg-type]
+    assert info is not None and info.duration_sec == pytest.approx(3.0)
+    assert spool.tell() == 0
+
+    # Autres formats : ffprobe ouvre le spool lui-même, sans copie en mémoire
+    seen: dict = {}
+
+    def fake_run(cmd: list, **kwargs: Any) -> Any:
+        with open(cmd[-1], "rb") as f:
+            seen["head"] = f.read(4)
+        seen["fds"] = kwargs.get("pass_fds")
+        stream = {"codec_name": "opus", "sample_rate": "48000", "duration": "4.5"}
+        out = {"format": {"format_name": "matroska,webm"}, "streams": [stream]}
+        return SimpleNamespace(stdout=json.dumps(out).encode())
+
+    monkeypatch.setattr(audio_probe, "which", lambda name: "/usr/bin/ffprobe")
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    spool = tempfile.SpooledTemporaryFile(max_size=4)
+    spool.write(b"\x1aE\xdf\xa3 webm cluster data")
+    info = audio_probe.probe(spool)  # type: ignore[arg-type]
+    assert info is not None
+    assert (info.container, info.codec, info.duration_sec) == ("webm", "opus", 4.5)
+    assert seen["head"] == b"\x1aE\xdf\xa3" and seen["fds"]
+
+
+@pytest.mark.asyncio
+async def test_large_pcm_wav_is_sliced_without_ffmpeg(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import io
+    import wave
+    from types import SimpleNamespace
+
+    pieces = []
+
+    def fake_stt(
+        client: Any, audio_bytes: bytes, fname: str, language_hint: Any
+    ) -> Any:
+        with wave.open(io.BytesIO(audio_bytes)) as w:
+            pieces.append((fname, w.getnframes(), w.getframerate(), w.getnchannels()))
+        segments = [{"start": 0.0, "end": 0.5, "text": fname}]
+        return SimpleNamespace(text=fname, language="fr", segments=segments)
+
+    def no_decode(file_bytes: bytes, filename: str) -> Any:
+        raise AssertionError("passthrough must not decode")
+
+    monkeypatch.setattr(transcription, "_openai_stt_bytes", fake_stt)
+    monkeypatch.setattr(transcription, "_load_and_resample", no_decode)
+    monkeypatch.setattr(transcription.settings, "ASR_FAST_LANE_MAX_SEC", 0.0)
+    monkeypatch.setattr(transcription, "MAX_BYTES", 44 + 32000)  # 1 s de PCM 16 kHz
+
+    text, segs, lang = await transcription.transcribe_audio(_wav_bytes(2.5), "long.wav")
+    assert sorted(pieces) == [
+        ("chunk_0.wav", 16000, 16000, 1),
+        ("chunk_1.wav", 16000, 16000, 1),
+        ("chunk_2.wav", 8000, 16000, 1),
+    ]
+    assert text == "chunk_0.wav chunk_1.wav chunk_2.wav"
+    assert segs.start.tolist() == [0.0, 1.0, 2.0]
+
+    # Fichier assez petit pour un appel, mais plus long que le modèle n'accepte
+    pieces.clear()
+    monkeypatch.setattr(transcription, "MAX_BYTES", 24 * 1024 * 1024)
+    monkeypatch.setattr(transcription.settings, "ASR_MAX_CHUNK_SEC", 1.0)
+    await transcription.transcribe_audio(_wav_bytes(2.5), "long.wav")
+    assert [p[0] for p in sorted(pieces)] == [f"chunk_{k}.wav" for k in range(3)]
+
+    # 44,1 kHz : tranches brutes plus lourdes que l'audio décodé, on décode
+    with pytest.raises(AssertionError, match="passthrough must not decode"):
+        await transcription.transcribe_audio(_wav_bytes(2.5, rate=44100), "hifi.wav")
+
+
+def test_compressed_upload_codec_cuts_chunk_count(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from types import SimpleNamespace
+
+    from pydub import AudioSegment
+
+    from app.services import audio_codecs
+
+    mib = 24 * 1024 * 1024
+    assert audio_codecs.get_codec("wav").max_chunk_sec(mib) == 707
+    assert audio_codecs.get_codec("flac").max_chunk_sec(mib) == 943
+    assert (
+        audio_codecs.get_codec("opus", "24k").max_chunk_sec(mib) == 1400
+    )  # plafond modèle
+    with pytest.raises(ValueError):
+        audio_codecs.get_codec("aac")
+
+    # ffmpeg absent ici : export simulé au débit nominal du codec
+    def fake_export(self: Any, seg: Any) -> bytes:
+        return b"x" * int(len(seg) / 1000.0 * self.bytes_per_sec)
+
+    sent = []
+
+    def fake_stt(
+        client: Any, audio_bytes: bytes, fname: str, language_hint: Any
+    ) -> Any:
+        sent.append(fname)
+        return SimpleNamespace(text=fname, language="fr", segments=None)
+
+    monkeypatch.setattr(audio_codecs.UploadCodec, "export", fake_export)
+    monkeypatch.setattr(transcription, "_openai_stt_bytes", fake_stt)
+    monkeypatch.setattr(transcription, "MAX_BYTES", 300_000)
+    audio = AudioSegment.silent(duration=300_000, frame_rate=16000)
+
+    monkeypatch.setattr(transcription.settings, "ASR_UPLOAD_CODEC", "wav")
+    transcription._openai_transcribe_audio(audio, None)
+    wav_requests = len(sent)
+
+    sent.clear()
+    monkeypatch.setattr(transcription.settings, "ASR_UPLOAD_CODEC", "opus")
+    transcription._openai_transcribe_audio(audio, None)
+    assert len(sent) == 4 and all(name.endswith(".ogg") for name in sent)
+    assert wav_requests == 38